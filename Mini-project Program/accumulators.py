@@ -0,0 +1,177 @@
+"""Out-of-core statistics accumulators fed chunk by chunk.
+
+Each accumulator keeps only the sufficient statistics of a test, so data that
+doesn't fit in memory can be streamed through pd.read_csv(chunksize=...):
+
+- GroupMomentsAccumulator: per-group count, mean and sum of squared deviations,
+  enough for one-way ANOVA and the pooled or Welch t-test.
+- ContingencyAccumulator: running contingency counts for the chi-square test.
+- OLSAccumulator: X'X, X'y and y'y sums for ordinary least squares.
+
+Results match the in-memory tests in gex3/gex4 and are returned as dicts of the
+same shape. Accumulators of the same kind can be merged, so separate files or
+processes can each build one and combine them at the end.
+"""
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+import ols
+
+
+class GroupMomentsAccumulator:
+    """Per-group count, mean and M2 of a numeric column, for ANOVA and t-tests."""
+
+    def __init__(self, value_column, group_column):
+        self.value_column = value_column
+        self.group_column = group_column
+        # Groups in order of first appearance, like Series.unique()
+        self.moments = pd.DataFrame({'n': [], 'mean': [], 'm2': []})
+
+    def update(self, chunk):
+        """Add the rows of a DataFrame chunk."""
+        grouped = chunk[[self.group_column, self.value_column]].dropna().groupby(
+            self.group_column, sort=False, observed=True)[self.value_column]
+        moments = pd.DataFrame({'n': grouped.count().astype(float), 'mean': grouped.mean(),
+                                'm2': grouped.var(ddof=0) * grouped.count()})
+        return self._combine(moments)
+
+    def merge(self, other):
+        """Add the groups summarized by another accumulator."""
+        return self._combine(other.moments)
+
+    def _combine(self, moments):
+        labels = self.moments.index.append(moments.index.difference(self.moments.index, sort=False))
+        a = self.moments.reindex(labels, fill_value=0.0)
+        b = moments.reindex(labels, fill_value=0.0)
+        n = a['n'] + b['n']
+        # Chan et al. pairwise update; empty sides contribute nothing
+        delta = (b['mean'] - a['mean']).where((a['n'] > 0) & (b['n'] > 0), 0.0)
+        mean = a['mean'].where(a['n'] > 0, b['mean']) + delta * b['n'] / n.where(n > 0, 1)
+        m2 = a['m2'] + b['m2'] + delta ** 2 * a['n'] * b['n'] / n.where(n > 0, 1)
+        self.moments = pd.DataFrame({'n': n, 'mean': mean, 'm2': m2})
+        return self
+
+    def anova(self):
+        """One-way ANOVA across all groups, as stats.f_oneway computes it."""
+        n, mean, m2 = self.moments['n'], self.moments['mean'], self.moments['m2']
+        k, total = len(n), n.sum()
+        grand_mean = (n * mean).sum() / total
+        between = (n * (mean - grand_mean) ** 2).sum()
+        within = m2.sum()
+        f_val = (between / (k - 1)) / (within / (total - k))
+        return {'test': 'anova', 'statistic': f_val, 'p_value': stats.f.sf(f_val, k - 1, total - k),
+                'groups': k, 'n': int(total)}
+
+    def ttest(self, equal_var=True):
+        """Two-sample t-test between the two groups (Welch's test if equal_var is False)."""
+        if len(self.moments) != 2:
+            raise ValueError(f"{self.group_column} must have exactly 2 groups for a t-Test.")
+        (n1, n2), (mean1, mean2), (m2_1, m2_2) = (self.moments[column].to_numpy() for column in ('n', 'mean', 'm2'))
+        var1, var2 = m2_1 / (n1 - 1), m2_2 / (n2 - 1)
+        if equal_var:
+            dof = n1 + n2 - 2
+            standard_error = np.sqrt((m2_1 + m2_2) / dof * (1 / n1 + 1 / n2))
+        else:
+            standard_error = np.sqrt(var1 / n1 + var2 / n2)
+            dof = standard_error ** 4 / ((var1 / n1) ** 2 / (n1 - 1) + (var2 / n2) ** 2 / (n2 - 1))
+        t_val = (mean1 - mean2) / standard_error
+        return {'test': 'ttest' if equal_var else 'welch_ttest', 'statistic': t_val,
+                'p_value': 2 * stats.t.sf(abs(t_val), dof), 'dof': dof, 'n': int(n1 + n2)}
+
+
+class ContingencyAccumulator:
+    """Running contingency counts of two categorical columns, for the chi-square test."""
+
+    def __init__(self, column1, column2):
+        self.column1 = column1
+        self.column2 = column2
+        self.counts = pd.Series(dtype=float)
+
+    def update(self, chunk):
+        """Add the rows of a DataFrame chunk."""
+        counts = chunk.groupby([self.column1, self.column2], observed=True).size()
+        self.counts = counts.astype(float) if self.counts.empty else self.counts.add(counts, fill_value=0)
+        return self
+
+    def merge(self, other):
+        """Add the counts of another accumulator."""
+        self.counts = other.counts.copy() if self.counts.empty else self.counts.add(other.counts, fill_value=0)
+        return self
+
+    def table(self):
+        """Return the contingency table as a DataFrame, like pd.crosstab."""
+        return self.counts.unstack(fill_value=0)
+
+    def chisquare(self):
+        """Chi-square test of independence, as stats.chi2_contingency computes it."""
+        table = self.table()
+        stat, p, dof, expected = stats.chi2_contingency(table)
+        return {'test': 'chisquare', 'statistic': stat, 'p_value': p, 'dof': dof, 'n': int(table.values.sum())}
+
+
+class OLSAccumulator:
+    """X'X, X'y and y'y sums of a linear regression with intercept."""
+
+    def __init__(self, dependent, independents):
+        self.dependent = dependent
+        self.independents = [independents] if isinstance(independents, str) else list(independents)
+        size = len(self.independents) + 1
+        self.xtx = np.zeros((size, size))
+        self.xty = np.zeros(size)
+        self.yty = 0.0
+        self.n = 0
+
+    def update(self, chunk):
+        """Add the complete rows of a DataFrame chunk."""
+        rows = chunk[self.independents + [self.dependent]].dropna().to_numpy(dtype=float)
+        x = np.column_stack((np.ones(len(rows)), rows[:, :-1]))
+        y = rows[:, -1]
+        self.xtx += x.T @ x
+        self.xty += x.T @ y
+        self.yty += y @ y
+        self.n += len(rows)
+        return self
+
+    def merge(self, other):
+        """Add the sums of another accumulator."""
+        self.xtx += other.xtx
+        self.xty += other.xty
+        self.yty += other.yty
+        self.n += other.n
+        return self
+
+    def fit(self):
+        """Solve the normal equations; returns coefficients, standard errors, t, p and R²."""
+        names = ['const'] + self.independents
+        coefficients, standard_errors, residual = ols.solve_normal_equations(self.xtx, self.xty, self.yty, self.n)
+        dof = self.n - len(names)
+        total = self.yty - self.xty[0] ** 2 / self.n
+        t_values = coefficients / standard_errors
+        return {'test': 'regression', 'coefficients': dict(zip(names, coefficients)),
+                'standard_errors': dict(zip(names, standard_errors)),
+                't_values': dict(zip(names, t_values)),
+                'p_values': dict(zip(names, 2 * stats.t.sf(np.abs(t_values), dof))),
+                'r_squared': 1 - residual / total, 'n': self.n}
+
+    def regression(self):
+        """Simple-regression result in the shape of StatisticalTests.compute_regression."""
+        fit = self.fit()
+        slope = self.independents[0]
+        return {'test': 'regression', 'statistic': fit['t_values'][slope], 'p_value': fit['p_values'][slope],
+                'intercept': fit['coefficients']['const'], 'slope': fit['coefficients'][slope],
+                'r_squared': fit['r_squared'], 'n': fit['n']}
+
+
+def accumulate_csv(path, accumulators, chunksize=1_000_000, encoding='ISO-8859-1'):
+    """Feed every chunk of a CSV to each accumulator, reading only the columns they use."""
+    columns = set()
+    for accumulator in accumulators:
+        for name in ('value_column', 'group_column', 'column1', 'column2', 'dependent'):
+            if hasattr(accumulator, name):
+                columns.add(getattr(accumulator, name))
+        columns.update(getattr(accumulator, 'independents', []))
+    for chunk in pd.read_csv(path, usecols=sorted(columns), chunksize=chunksize, encoding=encoding):
+        for accumulator in accumulators:
+            accumulator.update(chunk)
+    return accumulators
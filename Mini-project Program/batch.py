@@ -0,0 +1,189 @@
+"""Run statistical analyses without prompts from a JSON/YAML job file or command-line arguments.
+
+A job file lists datasets and the analyses to run on each:
+
+    {
+        "output": "results.csv",
+        "datasets": [
+            {"path": "test.csv",
+             "analyses": [
+                 {"test": "anova", "x": "Weight", "y": "NObeyesdad"},
+                 {"test": "chisquare", "x": ["Gender", "SMOKE"], "y": "*"}
+             ]}
+        ]
+    }
+
+`x` and `y` are the first and second variable of the test, in the same order
+as the interactive menu: anova/kruskal/ttest take (continuous, categorical),
+chisquare takes (categorical, categorical) and regression takes (dependent,
+independent). Each may be a column name, a list of names, or "*" for every
+column of the matching kind; all x/y combinations are run. Analyses listed at
+the top level of the job run on every dataset. A dataset entry with
+"sweep": true also runs every pairwise test from sweep.py on it.
+
+Usage:
+    python batch.py job.json [-o results.csv]
+    python batch.py --data test.csv --test anova --x Weight Height --y NObeyesdad
+"""
+import argparse
+import itertools
+import json
+import time
+
+import pandas as pd
+
+import gex3
+import gex4
+import loader
+import sweep
+
+# Which kind of column each test takes as (x, y)
+TEST_ROLES = {
+    'anova': ('numeric', 'categorical'),
+    'kruskal': ('numeric', 'categorical'),
+    'ttest': ('numeric', 'categorical'),
+    'chisquare': ('categorical', 'categorical'),
+    'regression': ('numeric', 'numeric'),
+}
+RESULT_COLUMNS = ['dataset', 'test', 'x', 'y', 'statistic', 'p_value', 'n', 'seconds', 'error']
+
+
+def run_analysis(data, test, x, y):
+    """Run one test on a DataFrame and return its result as a dict."""
+    if test == 'anova':
+        return gex3.DataAnalysis(data).compute_anova(x, y)
+    if test == 'kruskal':
+        return gex3.DataAnalysis(data).compute_kruskal_wallis(x, y)
+    if test == 'ttest':
+        return gex4.StatisticalTests(data).compute_ttest(x, y)
+    if test == 'chisquare':
+        return gex4.StatisticalTests(data).compute_chisquare(x, y)
+    if test == 'regression':
+        return gex4.StatisticalTests(data).compute_regression(x, y)
+    raise ValueError(f"Unknown test '{test}'. Choose from: {', '.join(TEST_ROLES)}.")
+
+
+def columns_of_kind(data, kind):
+    """Return the numeric or categorical columns of a DataFrame."""
+    if kind == 'numeric':
+        return data.select_dtypes(include='number').columns.tolist()
+    return data.select_dtypes(include=['category', 'object']).columns.tolist()
+
+
+def expand_variables(data, value, kind):
+    """Turn a column name, list of names or "*" into a list of column names."""
+    if value == '*':
+        return columns_of_kind(data, kind)
+    if isinstance(value, str):
+        return [value]
+    return list(value)
+
+
+def expand_analyses(data, analyses):
+    """Yield (test, x, y) for every variable combination of every analysis."""
+    for analysis in analyses:
+        test = analysis['test']
+        if test not in TEST_ROLES:
+            raise ValueError(f"Unknown test '{test}'. Choose from: {', '.join(TEST_ROLES)}.")
+        x_kind, y_kind = TEST_ROLES[test]
+        x_vars = expand_variables(data, analysis['x'], x_kind)
+        y_vars = expand_variables(data, analysis['y'], y_kind)
+        for x, y in itertools.product(x_vars, y_vars):
+            if x != y:
+                yield test, x, y
+
+
+def run_dataset(data, analyses, name=''):
+    """Run analyses on one DataFrame and return a list of result rows."""
+    rows = []
+    for test, x, y in expand_analyses(data, analyses):
+        row = {'dataset': name, 'test': test, 'x': x, 'y': y}
+        start = time.perf_counter()
+        try:
+            result = run_analysis(data, test, x, y)
+            result.pop('test', None)
+            row.update(result)
+        except Exception as e:
+            row['error'] = f"{type(e).__name__}: {e}"
+        row['seconds'] = time.perf_counter() - start
+        rows.append(row)
+    return rows
+
+
+def results_table(rows):
+    """Build the results DataFrame with the standard columns first."""
+    results = pd.DataFrame(rows)
+    for column in RESULT_COLUMNS:
+        if column not in results.columns:
+            results[column] = None
+    extra = [column for column in results.columns if column not in RESULT_COLUMNS]
+    return results[RESULT_COLUMNS + extra]
+
+
+def run_job(job):
+    """Run every analysis of a job spec (a dict, see module docstring) and return the results table."""
+    rows = []
+    for dataset in job['datasets']:
+        if isinstance(dataset, str):
+            dataset = {'path': dataset}
+        data = loader.load_dataset(dataset['path'], encoding=dataset.get('encoding', 'ISO-8859-1'),
+                                   report=False)
+        name = dataset.get('name', dataset['path'])
+        analyses = job.get('analyses', []) + dataset.get('analyses', [])
+        rows.extend(run_dataset(data, analyses, name))
+        if dataset.get('sweep'):
+            sweep_results = sweep.run_sweep(data, job.get('workers'), job.get('alpha', 0.05))
+            rows.extend(dict(row, dataset=name) for row in sweep_results.to_dict('records'))
+    return results_table(rows)
+
+
+def load_job(path):
+    """Read a job spec from a JSON or YAML file."""
+    with open(path) as f:
+        if path.endswith(('.yml', '.yaml')):
+            import yaml
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def write_results(results, path):
+    """Write the results table as CSV, Parquet or JSON depending on the extension."""
+    if path.endswith('.parquet'):
+        results.to_parquet(path, index=False)
+    elif path.endswith('.json'):
+        results.to_json(path, orient='records', indent=2)
+    else:
+        results.to_csv(path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run statistical analyses without prompts.")
+    parser.add_argument('job', nargs='?', help="JSON or YAML job file")
+    parser.add_argument('-o', '--output', help="Results file (.csv, .parquet or .json)")
+    parser.add_argument('--data', nargs='+', default=[], help="Dataset(s) to analyse instead of a job file")
+    parser.add_argument('--test', choices=sorted(TEST_ROLES), help="Test to run on --data")
+    parser.add_argument('--x', nargs='+', default=['*'], help="First variable(s), or * for all")
+    parser.add_argument('--y', nargs='+', default=['*'], help="Second variable(s), or * for all")
+    args = parser.parse_args(argv)
+
+    if args.job:
+        job = load_job(args.job)
+    elif args.data and args.test:
+        x = '*' if args.x == ['*'] else args.x
+        y = '*' if args.y == ['*'] else args.y
+        job = {'datasets': args.data, 'analyses': [{'test': args.test, 'x': x, 'y': y}]}
+    else:
+        parser.error("give a job file, or --data and --test")
+
+    results = run_job(job)
+    output = args.output or job.get('output')
+    if output:
+        write_results(results, output)
+        print(f"Wrote {len(results)} results to {output}")
+    else:
+        print(results.to_string(index=False))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Compare sentiment throughput (rows per second) of the VADER and DistilBERT backends.
+
+Usage:
+    python bench_sentiment.py reviews.csv --column text_column --rows 5000
+    python bench_sentiment.py --rows 5000     # synthetic texts from datagen.py
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+
+import datagen
+import gex5
+
+def time_backend(texts, backend, **kwargs):
+    """Score texts with one backend and return (seconds, rows per second)."""
+    start = time.perf_counter()
+    if backend == 'distilbert':
+        gex5.score_distilbert(texts, **kwargs)
+    else:
+        gex5.score_texts(texts, backend, **kwargs)
+    seconds = time.perf_counter() - start
+    return seconds, len(texts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('input', nargs='?', help="CSV file with a text column (synthetic texts if omitted)")
+    parser.add_argument('--column', default='text_column')
+    parser.add_argument('--rows', type=int, default=5000, help="Number of rows to score")
+    parser.add_argument('--workers', type=int, default=None, help="VADER worker processes")
+    parser.add_argument('--threads', type=int, default=None, help="DistilBERT CPU threads")
+    parser.add_argument('--batch-size', type=int, default=gex5.DEFAULT_BATCH_SIZE)
+    parser.add_argument('--model-dir', default=None, help="Local DistilBERT model directory")
+    args = parser.parse_args()
+
+    if args.input:
+        texts = pd.read_csv(args.input, usecols=[args.column], nrows=args.rows, encoding='ISO-8859-1')[args.column]
+    else:
+        texts = datagen.generate_dataset(args.rows)['text_column']
+
+    results = {'vader': time_backend(texts, 'vader', workers=args.workers)}
+    model_dir = args.model_dir or gex5.DISTILBERT_MODEL_DIR
+    if os.path.isdir(model_dir):
+        # Load the model once up front so the timing covers inference only
+        gex5.score_distilbert(texts[:1], model_dir=model_dir)
+        results['distilbert'] = time_backend(texts, 'distilbert', model_dir=model_dir,
+                                             batch_size=args.batch_size, threads=args.threads)
+
+    print(f"{len(texts)} rows")
+    for backend, (seconds, rate) in results.items():
+        print(f"{backend:>10}: {seconds:8.2f} s  {rate:10.1f} rows/s")
+    if 'distilbert' not in results:
+        print(f"distilbert: skipped, no model at '{model_dir}' (set DISTILBERT_MODEL_DIR or pass --model-dir)")
+
+
+if __name__ == "__main__":
+    main()
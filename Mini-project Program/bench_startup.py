@@ -0,0 +1,87 @@
+"""Measure how long main.py takes to reach its first prompt, and what it imports on the way.
+
+Usage:
+    python bench_startup.py [--runs 5] [--top 15] [--max-seconds 0.5]
+
+Time-to-first-prompt starts `python main.py` with a pipe on stdin and stops
+the clock when the dataset prompt is printed. The import breakdown comes from
+`python -X importtime -c "import main"`. With --max-seconds the script exits
+with status 1 when the median time is above the limit, so it can guard CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROMPT = b"Enter the path to your dataset"
+
+
+def time_to_first_prompt(timeout=60):
+    """Start main.py and return the seconds until its first prompt appears."""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(HERE, 'main.py')], cwd=HERE,
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    output = b''
+    try:
+        while PROMPT not in output:
+            chunk = process.stdout.read1(4096)
+            if not chunk:
+                raise RuntimeError("main.py exited before showing its first prompt")
+            output += chunk
+            if time.perf_counter() - start > timeout:
+                raise TimeoutError("main.py did not show its first prompt in time")
+        return time.perf_counter() - start
+    finally:
+        process.kill()
+        process.wait()
+
+
+def import_times():
+    """Return [(cumulative microseconds, module)] for `import main`, slowest first."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'], cwd=HERE,
+                            capture_output=True, text=True, check=True)
+    times = []
+    for line in result.stderr.splitlines():
+        # Lines look like "import time:   self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        times.append((int(cumulative), module.strip()))
+    return sorted(times, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark main.py startup time.")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help="Slowest imports to list")
+    parser.add_argument('--max-seconds', type=float, default=None, help="Fail if the median exceeds this")
+    parser.add_argument('--json', help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    runs = [time_to_first_prompt() for _ in range(args.runs)]
+    imports = import_times()
+    median = statistics.median(runs)
+
+    print(f"Time to first prompt: median {median * 1000:.1f} ms, "
+          f"min {min(runs) * 1000:.1f} ms over {len(runs)} runs")
+    print(f"Modules imported by `import main`: {len(imports)}")
+    for cumulative, module in imports[:args.top]:
+        print(f"{cumulative / 1000:9.1f} ms  {module}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'time_to_first_prompt': runs, 'median': median,
+                       'imports': [{'module': module, 'cumulative_us': cumulative}
+                                   for cumulative, module in imports]}, f, indent=2)
+
+    if args.max_seconds is not None and median > args.max_seconds:
+        print(f"Startup is slower than {args.max_seconds} s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Time every analysis path on synthetic datasets and compare with a saved baseline.
+
+Usage:
+    python bench_suite.py --rows 10000 100000 1000000 --output bench.json
+    python bench_suite.py --rows 100000 --baseline bench.json [--tolerance 0.25]
+
+For each size, datagen.py writes a CSV shaped like test.csv, and every step
+below runs on it: loading (CSV parse and cached Parquet reload), profiling,
+ANOVA, Kruskal-Wallis, t-test, chi-square, regression, plotting (in render mode,
+to a temporary directory) and each sentiment backend. Each step records its
+wall time and peak traced memory (tracemalloc, which sees Python and NumPy
+allocations made in this process). Sentiment steps score at most
+--sentiment-rows texts, and DistilBERT is skipped when its model directory is
+missing. With --baseline, steps slower or larger than the baseline by more
+than --tolerance are listed and the script exits with status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import datagen
+import groups
+import gex2
+import gex3
+import gex4
+import gex5
+import loader
+import plotting
+import profiling
+
+# Differences smaller than these are noise, whatever the ratio
+MIN_SECONDS = 0.05
+MIN_MB = 1.0
+
+
+def _load(context):
+    # The first call parses the CSV and writes the Parquet sidecar; later calls read the sidecar
+    context['data'] = loader.load_dataset(context['path'], cache_dir=context['cache_dir'], report=False)
+
+
+def _profile(context):
+    profiling.profile(context['data'])
+
+
+def _anova(context):
+    gex3.DataAnalysis(context['data']).compute_anova('Weight', 'NObeyesdad')
+
+
+def _kruskal(context):
+    gex3.DataAnalysis(context['data']).compute_kruskal_wallis('Weight', 'NObeyesdad')
+
+
+def _ttest(context):
+    gex4.StatisticalTests(context['data']).compute_ttest('Height', 'Gender')
+
+
+def _chisquare(context):
+    gex4.StatisticalTests(context['data']).compute_chisquare('Gender', 'NObeyesdad')
+
+
+def _regression(context):
+    gex4.StatisticalTests(context['data']).compute_regression('Weight', 'Height')
+
+
+def _plots(context):
+    inspection = gex2.DataInspection()
+    inspection.df = context['data']
+    inspection.plot_histogram('Weight')
+    inspection.plot_boxplot('Weight')
+    inspection.plot_scatter('Height', 'Weight')
+    inspection.plot_bar_chart('MTRANS')
+    gex3.DataAnalysis(context['data']).visualize_anova('Weight', 'NObeyesdad')
+    context['renderer'].wait()
+
+
+def _sentiment(backend):
+    def step(context):
+        texts = context['data']['text_column'].iloc[:context['sentiment_rows']]
+        gex5.score_texts(texts, backend, workers=context['workers'])
+    return step
+
+
+def _distilbert(context):
+    if not os.path.isdir(gex5.DISTILBERT_MODEL_DIR):
+        return 'skipped'
+    texts = context['data']['text_column'].iloc[:context['sentiment_rows']]
+    gex5.score_distilbert(texts, threads=context['workers'])
+
+
+STEPS = {
+    'load_csv': _load,
+    'load_cached': _load,
+    'profile': _profile,
+    'anova': _anova,
+    'kruskal': _kruskal,
+    'ttest': _ttest,
+    'chisquare': _chisquare,
+    'regression': _regression,
+    'plots': _plots,
+    'sentiment_vader': _sentiment('vader'),
+    'sentiment_textblob': _sentiment('textblob'),
+    'sentiment_distilbert': _distilbert,
+}
+
+
+def measure(step, context):
+    """Run one step and return its seconds, peak traced MB and status."""
+    if 'data' in context:
+        # Start every test from cold group indexes so steps don't borrow each other's work
+        groups.invalidate(context['data'])
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        status = step(context) or 'ok'
+    except Exception as e:
+        status = f'error: {e}'
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': seconds, 'peak_mb': peak / 1024 ** 2, 'status': status}
+
+
+def run_suite(sizes, steps=None, seed=0, cardinality=None, text_words=20, sentiment_rows=10_000, workers=None):
+    """Run the selected steps on a synthetic dataset of each size and return one record per (rows, step)."""
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        renderer = plotting.enable_render_mode(os.path.join(workdir, 'figures'))
+        try:
+            for rows in sizes:
+                path = datagen.write_csv(os.path.join(workdir, f'synthetic-{rows}.csv'), rows, seed,
+                                         cardinality, text_words)
+                context = {'path': path, 'cache_dir': os.path.join(workdir, 'cache'), 'renderer': renderer,
+                           'sentiment_rows': sentiment_rows, 'workers': workers}
+                for name in steps or STEPS:
+                    if STEPS[name] is not _load and 'data' not in context:
+                        _load(context)
+                    record = {'rows': rows, 'step': name, **measure(STEPS[name], context)}
+                    print(f"{rows:>10} {name:<22} {record['seconds']:9.3f} s {record['peak_mb']:9.1f} MB"
+                          f"  {record['status']}")
+                    results.append(record)
+                os.remove(path)
+        finally:
+            plotting.disable_render_mode()
+    return results
+
+
+def compare(results, baseline, tolerance=0.25):
+    """Return the results that are slower or use more memory than the baseline beyond the tolerance."""
+    previous = {(record['rows'], record['step']): record for record in baseline['results']}
+    regressions = []
+    for record in results:
+        old = previous.get((record['rows'], record['step']))
+        if old is None or record['status'] != 'ok' or old['status'] != 'ok':
+            continue
+        for metric, floor in (('seconds', MIN_SECONDS), ('peak_mb', MIN_MB)):
+            if record[metric] > old[metric] * (1 + tolerance) and record[metric] - old[metric] > floor:
+                regressions.append({'rows': record['rows'], 'step': record['step'], 'metric': metric,
+                                    'baseline': old[metric], 'current': record[metric]})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every analysis path on synthetic data.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000], help="Dataset sizes to run")
+    parser.add_argument('--steps', nargs='+', choices=list(STEPS), default=None, help="Steps to run (all by default)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cardinality', type=int, default=None, help="Levels per categorical column except Gender")
+    parser.add_argument('--text-words', type=int, default=20, help="Mean words per text row")
+    parser.add_argument('--sentiment-rows', type=int, default=10_000, help="Texts scored per sentiment step")
+    parser.add_argument('--workers', type=int, default=None, help="Sentiment worker processes or threads")
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown, e.g. 0.25 for 25%%")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.rows, args.steps, args.seed, args.cardinality, args.text_words,
+                        args.sentiment_rows, args.workers)
+    report = {'meta': {'python': sys.version.split()[0], 'platform': platform.platform(),
+                       'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'seed': args.seed,
+                       'cardinality': args.cardinality, 'text_words': args.text_words,
+                       'sentiment_rows': args.sentiment_rows},
+              'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression['rows']} {regression['step']} {regression['metric']}: "
+                  f"{regression['baseline']:.3f} -> {regression['current']:.3f}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
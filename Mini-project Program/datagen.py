@@ -0,0 +1,85 @@
+"""Generate synthetic datasets shaped like test.csv for benchmarks.
+
+The columns match the obesity dataset in test.csv (same names, numeric ranges
+and categorical levels), plus an optional free-text column for the sentiment
+backends. Weight depends on Height and NObeyesdad so the statistical tests
+have real effects to find.
+
+Usage:
+    python datagen.py out.csv --rows 1000000 [--cardinality 50] [--text-words 20]
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+CATEGORIES = {
+    'Gender': ['Female', 'Male'],
+    'family_history_with_overweight': ['yes', 'no'],
+    'FAVC': ['yes', 'no'],
+    'CAEC': ['Sometimes', 'Frequently', 'Always', 'no'],
+    'SMOKE': ['no', 'yes'],
+    'SCC': ['no', 'yes'],
+    'CALC': ['Sometimes', 'no', 'Frequently', 'Always'],
+    'MTRANS': ['Public_Transportation', 'Automobile', 'Walking', 'Motorbike', 'Bike'],
+    'NObeyesdad': ['Insufficient_Weight', 'Normal_Weight', 'Overweight_Level_I', 'Overweight_Level_II',
+                   'Obesity_Type_I', 'Obesity_Type_II', 'Obesity_Type_III'],
+}
+COLUMN_ORDER = ['Gender', 'Age', 'Height', 'Weight', 'family_history_with_overweight', 'FAVC', 'FCVC',
+                'NCP ', 'CAEC', 'SMOKE', 'CH2O', 'SCC', 'FAF', 'TUE', 'CALC', 'MTRANS', 'NObeyesdad']
+WORDS = ['good', 'bad', 'great', 'terrible', 'ok', 'love', 'hate', 'the', 'food', 'gym', 'walk', 'really',
+         'not', 'very', 'healthy', 'tired', 'happy', 'slow', 'fast', 'water', 'again', 'never', 'always']
+
+
+def generate_dataset(rows, seed=0, cardinality=None, text_words=20):
+    """Return a DataFrame of `rows` synthetic rows shaped like test.csv.
+
+    With `cardinality`, every categorical column except Gender gets that many
+    levels instead of its usual ones; Gender keeps two so the t-test still
+    applies. With `text_words` > 0 a `text_column` of about that many words per
+    row is added; pass 0 to leave it out.
+    """
+    rng = np.random.default_rng(seed)
+    data = {}
+    levels = {column: [f'{column}_{i}' for i in range(cardinality)] if cardinality and column != 'Gender'
+              else values for column, values in CATEGORIES.items()}
+    for column, values in levels.items():
+        if column != 'NObeyesdad':
+            data[column] = pd.Categorical.from_codes(rng.integers(0, len(values), rows), values).astype(str)
+
+    # Weight rises with the NObeyesdad level, by up to 72 kg from the lowest to the highest
+    level = rng.integers(0, len(levels['NObeyesdad']), rows)
+    data['NObeyesdad'] = np.array(levels['NObeyesdad'])[level]
+    effect = 72 * level / max(len(levels['NObeyesdad']) - 1, 1)
+    data['Age'] = np.round(rng.gamma(6.0, 4.0, rows) + 14, 6)
+    data['Height'] = np.round(rng.normal(1.70, 0.093, rows), 6)
+    data['Weight'] = np.round(np.clip(60 * data['Height'] ** 2 + effect + rng.normal(0, 12, rows) - 40,
+                                      39, 173), 6)
+    for column, low, high in (('FCVC', 1, 3), ('NCP ', 1, 4), ('CH2O', 1, 3), ('FAF', 0, 3), ('TUE', 0, 2)):
+        data[column] = np.round(rng.uniform(low, high, rows), 6)
+
+    frame = pd.DataFrame(data)[COLUMN_ORDER]
+    if text_words:
+        lengths = rng.poisson(text_words, rows) + 1
+        words = np.array(WORDS)[rng.integers(0, len(WORDS), lengths.sum())]
+        frame['text_column'] = [' '.join(chunk) for chunk in np.split(words, np.cumsum(lengths)[:-1])]
+    return frame
+
+
+def write_csv(path, rows, seed=0, cardinality=None, text_words=20, chunk_rows=1_000_000):
+    """Write a synthetic dataset to CSV, generating chunk_rows rows at a time to bound memory."""
+    for number, start in enumerate(range(0, rows, chunk_rows)):
+        chunk = generate_dataset(min(chunk_rows, rows - start), seed + number, cardinality, text_words)
+        chunk.to_csv(path, mode='w' if number == 0 else 'a', header=number == 0, index=False)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset shaped like test.csv.")
+    parser.add_argument('output', help="CSV file to write")
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cardinality', type=int, default=None, help="Levels per categorical column except Gender")
+    parser.add_argument('--text-words', type=int, default=20, help="Mean words per text row (0 for none)")
+    args = parser.parse_args()
+    write_csv(args.output, args.rows, args.seed, args.cardinality, args.text_words)
@@ -1,5 +1,9 @@
 import pandas as pd
 import matplotlib.pyplot as plt
+import groups
+import instrument
+import plotting
+import profiling
 
 class DataInspection:
     def __init__(self):
@@ -9,23 +13,39 @@ class DataInspection:
         """Load a CSV file into a DataFrame."""
         self.df = pd.read_csv(file_path)
 
+    @instrument.timed(rows='df')
+    def profile(self):
+        """Summarize every column in one pass: counts, missing, moments, quantiles and top values."""
+        return profiling.profile(self.df)
+
+    @instrument.timed(rows='df')
     def handle_missing_values(self, column_name):
         """Handle missing values based on column type."""
         missing_count = self.df[column_name].isna().sum()
         if missing_count < len(self.df) * 0.5:
             # Fill with mean or mode
+            # Assign back: fillna(inplace=True) on a column no longer updates the frame under copy-on-write
             if pd.api.types.is_numeric_dtype(self.df[column_name]):
-                self.df[column_name].fillna(self.df[column_name].mean(), inplace=True)
+                self.df[column_name] = self.df[column_name].fillna(self.df[column_name].mean())
             else:
-                self.df[column_name].fillna(self.df[column_name].mode()[0], inplace=True)
+                self.df[column_name] = self.df[column_name].fillna(self.df[column_name].mode()[0])
         else:
             # Drop column
             self.df.drop(column_name, axis=1, inplace=True)
+        groups.invalidate(self.df, column_name)
+        self._record_transformation('handle_missing_values', column_name)
 
+    @instrument.timed(rows='df')
     def check_data_types(self, column_name):
         """Check and convert data types if necessary."""
         if self.df[column_name].dtype == 'object':
             self.df[column_name] = pd.to_numeric(self.df[column_name], errors='coerce')
+            groups.invalidate(self.df, column_name)
+            self._record_transformation('check_data_types', column_name)
+
+    def _record_transformation(self, name, column_name):
+        # Part of the dataset fingerprint used by result_cache
+        self.df.attrs.setdefault('transformations', []).append([name, column_name])
 
     def classify_and_calculate(self, column_name):
         """Calculate statistics based on the column type."""
@@ -38,32 +58,49 @@ class DataInspection:
             self.plot_bar_chart(column_name)  # Ensure bar chart is called
             return mode_val
 
+    @instrument.timed(rows='df')
     def plot_histogram(self, column_name):
         """Plot a histogram of a numeric column."""
         if pd.api.types.is_numeric_dtype(self.df[column_name]):
-            plt.hist(self.df[column_name], bins=30, alpha=0.7, color='blue')
+            if plotting.is_large(self.df):
+                # Bin with NumPy and draw the precomputed counts
+                counts, edges = plotting.histogram_summary(self.df[column_name], bins=30)
+                plotting.draw_histogram(counts, edges, alpha=0.7, color='blue')
+            else:
+                plt.hist(self.df[column_name], bins=30, alpha=0.7, color='blue')
             plt.title(f'Histogram of {column_name}')
             plt.xlabel(column_name)
             plt.ylabel('Frequency')
-            plt.show()
+            plotting.show(f'histogram-{column_name}')
 
+    @instrument.timed(rows='df')
     def plot_boxplot(self, column_name):
         """Plot a boxplot of a numeric column."""
         if pd.api.types.is_numeric_dtype(self.df[column_name]):
-            plt.boxplot(self.df[column_name])
+            if plotting.is_large(self.df):
+                plotting.draw_boxplots([plotting.box_summary(self.df[column_name])])
+            else:
+                plt.boxplot(self.df[column_name])
             plt.title(f'Boxplot of {column_name}')
             plt.ylabel(column_name)
-            plt.show()
+            plotting.show(f'boxplot-{column_name}')
 
+    @instrument.timed(rows='df')
     def plot_scatter(self, x_column, y_column):
         """Plot a scatter plot of two numeric columns."""
         if pd.api.types.is_numeric_dtype(self.df[x_column]) and pd.api.types.is_numeric_dtype(self.df[y_column]):
-            plt.scatter(self.df[x_column], self.df[y_column], alpha=0.7)
+            if plotting.is_large(self.df):
+                # Too many points to draw one by one; show their density instead
+                plt.hexbin(self.df[x_column], self.df[y_column], gridsize=60, mincnt=1, bins='log')
+                plt.colorbar(label='Count')
+            else:
+                plt.scatter(self.df[x_column], self.df[y_column], alpha=0.7)
             plt.title(f'Scatter Plot of {x_column} vs {y_column}')
             plt.xlabel(x_column)
             plt.ylabel(y_column)
-            plt.show()
+            plotting.show(f'scatter-{x_column}-{y_column}')
 
+    @instrument.timed(rows='df')
     def plot_bar_chart(self, column_name):
         """Plot a bar chart of categorical data."""
         if not pd.api.types.is_numeric_dtype(self.df[column_name]):
@@ -71,7 +108,7 @@ class DataInspection:
             plt.title(f'Bar Chart of {column_name}')
             plt.xlabel(column_name)
             plt.ylabel('Frequency')
-            plt.show()
+            plotting.show(f'bar-{column_name}')
 
     def ask_for_scatterplot(self):
         """Ask user for two continuous columns to plot a scatter plot."""
@@ -1,20 +1,43 @@
 # gex3.py
-import pandas as pd
 import scipy.stats as stats
-import matplotlib.pyplot as plt
-import seaborn as sns
+import groups as group_cache
+import instrument
+import plotting
+import result_cache
 
 class DataAnalysis:
-    def __init__(self, data):
+    def __init__(self, data, results=None):
         self.data = data
+        # Optional result_cache.DatasetResults; repeat tests on unchanged data are looked up
+        self.results = results
+
+    def group_values(self, continuous_var, categorical_var):
+        # Split the continuous data by the categorical variable, reusing the cached groups
+        return group_cache.group_values(self.data, continuous_var, categorical_var)
+
+    @instrument.timed(rows='data')
+    @result_cache.cached_result('anova')
+    def compute_anova(self, continuous_var, categorical_var):
+        """Perform a one-way ANOVA and return the result as a dict."""
+        groups = self.group_values(continuous_var, categorical_var)
+        f_val, p_val = stats.f_oneway(*groups)
+        return {'test': 'anova', 'statistic': f_val, 'p_value': p_val,
+                'groups': len(groups), 'n': sum(len(group) for group in groups)}
+
+    @instrument.timed(rows='data')
+    @result_cache.cached_result('kruskal')
+    def compute_kruskal_wallis(self, continuous_var, categorical_var):
+        """Perform a Kruskal-Wallis test and return the result as a dict."""
+        groups = self.group_values(continuous_var, categorical_var)
+        h_val, p_val = stats.kruskal(*groups)
+        return {'test': 'kruskal', 'statistic': h_val, 'p_value': p_val,
+                'groups': len(groups), 'n': sum(len(group) for group in groups)}
 
     def perform_anova(self, continuous_var, categorical_var):
         try:
-            # Group the data by the categorical variable and extract the continuous data
-            groups = [group[continuous_var].dropna().values for name, group in self.data.groupby(categorical_var)]
-            
             # Perform the ANOVA test
-            f_val, p_val = stats.f_oneway(*groups)
+            result = self.compute_anova(continuous_var, categorical_var)
+            f_val, p_val = result['statistic'], result['p_value']
             
             # Display results
             print(f"ANOVA results: F-value = {f_val}, P-value = {p_val}")
@@ -31,24 +54,33 @@ class DataAnalysis:
         except Exception as e:
             print(f"An error occurred: {e}")
 
+    @instrument.timed(rows='data')
     def visualize_anova(self, continuous_var, categorical_var):
         try:
             # Visualizing ANOVA results with a boxplot
+            import matplotlib.pyplot as plt
             plt.figure(figsize=(10, 6))
-            sns.boxplot(x=self.data[categorical_var], y=self.data[continuous_var])
+            if plotting.is_large(self.data):
+                # Draw the boxes from quartiles of the cached groups
+                groups = group_cache.group_index(self.data, categorical_var)
+                values = self.group_values(continuous_var, categorical_var)
+                plotting.draw_boxplots([plotting.box_summary(group_values, str(label))
+                                        for label, group_values in zip(groups.labels, values)])
+                plt.xlabel(categorical_var)
+                plt.ylabel(continuous_var)
+            else:
+                import seaborn as sns
+                sns.boxplot(x=self.data[categorical_var], y=self.data[continuous_var])
             plt.title(f"Boxplot of {continuous_var} by {categorical_var}")
-            plt.show()
+            plotting.show(f"anova-{continuous_var}-{categorical_var}")
         except Exception as e:
             print(f"Error during visualization: {e}")
 
+    @instrument.timed(rows='data')
     def check_normality(self, variable):
-        # Check if a variable follows a normal distribution using a Q-Q plot
-        from scipy import stats
-        import matplotlib.pyplot as plt
-        plt.figure(figsize=(6, 6))
-        stats.probplot(self.data[variable].dropna(), dist="norm", plot=plt)
-        plt.title(f"Q-Q Plot for {variable}")
-        plt.show()
+        # Check if a variable follows a normal distribution using a Q-Q plot (of a sample for large columns)
+        import normality
+        normality.qq_plot(self.data, variable)
 
     def calculate_skewness(self, variable):
         # Calculate and print skewness for a variable
@@ -58,11 +90,9 @@ class DataAnalysis:
 
     def perform_kruskal_wallis(self, continuous_var, categorical_var):
         try:
-            # Group the data by the categorical variable and extract the continuous data
-            groups = [group[continuous_var].dropna().values for name, group in self.data.groupby(categorical_var)]
-            
             # Perform the Kruskal-Wallis test
-            h_val, p_val = stats.kruskal(*groups)
+            result = self.compute_kruskal_wallis(continuous_var, categorical_var)
+            h_val, p_val = result['statistic'], result['p_value']
             
             # Display results
             print(f"Kruskal-Wallis results: H-value = {h_val}, P-value = {p_val}")
@@ -1,41 +1,90 @@
 import pandas as pd
 from scipy import stats
+import groups as group_cache
+import instrument
+import ols
+import result_cache
 
 class StatisticalTests:
-    def __init__(self, df=None):
-        """Initialize the class with a DataFrame."""
+    def __init__(self, df=None, results=None):
+        """Initialize the class with a DataFrame and an optional result_cache.DatasetResults."""
         if df is not None:
             self.data = df
         else:
             raise ValueError("DataFrame cannot be None.")
+        self.results = results
+
+    # Method to compute Chi-Square test results
+    @instrument.timed(rows='data')
+    @result_cache.cached_result('chisquare')
+    def compute_chisquare(self, categorical_var1, categorical_var2):
+        """Perform Chi-Square test on two categorical variables and return the result as a dict."""
+        contingency_table = pd.crosstab(self.data[categorical_var1], self.data[categorical_var2])
+        stat, p, dof, expected = stats.chi2_contingency(contingency_table)
+        return {'test': 'chisquare', 'statistic': stat, 'p_value': p, 'dof': dof,
+                'n': int(contingency_table.values.sum())}
 
     # Method to perform Chi-Square test
     def perform_chisquare(self, categorical_var1, categorical_var2):
         """Perform Chi-Square test on two categorical variables."""
-        contingency_table = pd.crosstab(self.data[categorical_var1], self.data[categorical_var2])
-        stat, p, dof, expected = stats.chi2_contingency(contingency_table)
+        result = self.compute_chisquare(categorical_var1, categorical_var2)
+        stat, p = result['statistic'], result['p_value']
         print(f"Chi-Square Statistic: {stat}, p-value: {p}")
         return stat, p
 
+    # Method to compute t-Test results
+    @instrument.timed(rows='data')
+    @result_cache.cached_result('ttest')
+    def compute_ttest(self, continuous_var, categorical_var):
+        """Perform an independent t-Test and return the result as a dict."""
+        groups = group_cache.group_index(self.data, categorical_var)
+        if len(groups) != 2:
+            raise ValueError(f"{categorical_var} must have exactly 2 groups for a t-Test.")
+        group1, group2 = group_cache.group_values(self.data, continuous_var, categorical_var)
+        stat, p = stats.ttest_ind(group1, group2)
+        return {'test': 'ttest', 'statistic': stat, 'p_value': p, 'n': len(group1) + len(group2)}
+
     # Method to perform t-Test (assuming this exists in gex4)
     def perform_tests(self, continuous_var, categorical_var):
         """Perform t-Test or other statistical tests."""
         # Implementation for t-Test or other tests
         print(f"Performing t-Test between {continuous_var} and {categorical_var}")
         # Example test using independent t-test (depending on the data):
-        groups = self.data[categorical_var].unique()
-        if len(groups) == 2:
-            group1 = self.data[self.data[categorical_var] == groups[0]][continuous_var]
-            group2 = self.data[self.data[categorical_var] == groups[1]][continuous_var]
-            stat, p = stats.ttest_ind(group1, group2)
-            print(f"t-Statistic: {stat}, p-value: {p}")
-        else:
-            print(f"{categorical_var} must have exactly 2 groups for a t-Test.")
+        try:
+            result = self.compute_ttest(continuous_var, categorical_var)
+            print(f"t-Statistic: {result['statistic']}, p-value: {result['p_value']}")
+        except ValueError as e:
+            print(e)
+
+    # Method to compute regression results
+    @instrument.timed(rows='data')
+    @result_cache.cached_result('regression')
+    def compute_regression(self, dependent_var, independent_var):
+        """Fit a simple linear regression and return the slope test as a dict."""
+        fit = ols.simple_regressions(self.data, [dependent_var], [independent_var])
+        result = {name: values[0, 0] for name, values in fit.items()}
+        return {'test': 'regression', 'statistic': result['t_value'], 'p_value': result['p_value'],
+                'intercept': result['intercept'], 'slope': result['slope'],
+                'r_squared': result['r_squared'], 'n': int(result['n'])}
+
+    # Method to compute many regressions at once
+    @instrument.timed(rows='data')
+    def compute_regressions(self, dependent_vars, independent_vars):
+        """Fit every dependent ~ independent pair and return arrays shaped (dependents, independents)."""
+        return ols.simple_regressions(self.data, dependent_vars, independent_vars)
 
     # Method to perform regression
-    def perform_regression(self, dependent_var, independent_var):
-        """Perform regression analysis."""
-        from statsmodels.formula.api import ols
-        formula = f'{dependent_var} ~ {independent_var}'
-        model = ols(formula, data=self.data).fit()
-        print(model.summary())
+    @instrument.timed(rows='data')
+    def perform_regression(self, dependent_var, independent_var, detailed=False):
+        """Perform regression analysis (detailed=True prints the full statsmodels summary)."""
+        if detailed:
+            import statsmodels.formula.api as smf
+            # Q() quotes column names that aren't valid Python names, such as 'NCP '
+            formula = f'Q("{dependent_var}") ~ Q("{independent_var}")'
+            model = smf.ols(formula, data=self.data).fit()
+            print(model.summary())
+            return
+        result = self.compute_regression(dependent_var, independent_var)
+        print(f"Regression of {dependent_var} on {independent_var} (n = {result['n']})")
+        print(f"Intercept: {result['intercept']}, Slope: {result['slope']}")
+        print(f"t-Statistic: {result['statistic']}, p-value: {result['p_value']}, R-squared: {result['r_squared']}")
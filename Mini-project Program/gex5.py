@@ -1,37 +1,383 @@
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from textblob import TextBlob
+import argparse
+import contextlib
+import glob
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import instrument
+import lru_store
+
+VADER_COLUMNS = ['compound', 'pos', 'neg', 'neu']
+TEXTBLOB_COLUMNS = ['polarity', 'subjectivity']
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_STREAM_CHUNK_SIZE = 100_000
+
+# DistilBERT is loaded from a local directory only, never downloaded
+DISTILBERT_MODEL_DIR = os.environ.get('DISTILBERT_MODEL_DIR', 'models/distilbert-base-uncased-finetuned-sst-2-english')
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_CACHE_PATH = os.path.join('.cache', 'sentiment_scores.sqlite')
+
+# VADER analyzer for the current process, built once on first use
+_analyzer = None
+# (model_dir, tokenizer, model) for the current process, loaded on first use
+_distilbert = None
+
+
+def _get_analyzer():
+    global _analyzer
+    if _analyzer is None:
+        from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+        _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+
+def _get_distilbert(model_dir):
+    global _distilbert
+    if _distilbert is None or _distilbert[0] != model_dir:
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(model_dir, local_files_only=True)
+        model = AutoModelForSequenceClassification.from_pretrained(model_dir, local_files_only=True)
+        model.eval()
+        _distilbert = (model_dir, tokenizer, model)
+    return _distilbert[1], _distilbert[2]
+
+
+@instrument.timed(rows=lambda texts, *args, **kwargs: len(texts))
+def score_distilbert(texts, model_dir=None, batch_size=DEFAULT_BATCH_SIZE, threads=None, max_length=512):
+    """Score texts with a DistilBERT sequence classifier on the CPU.
+
+    Returns a DataFrame with one probability column per model label plus the
+    predicted `label`. Texts are sorted by length before batching so each
+    padded batch holds texts of similar length.
+    """
+    import torch
+
+    model_dir = model_dir or DISTILBERT_MODEL_DIR
+    tokenizer, model = _get_distilbert(model_dir)
+    if threads:
+        torch.set_num_threads(threads)
+
+    index = texts.index if isinstance(texts, pd.Series) else None
+    texts = ['' if pd.isna(text) else str(text) for text in texts]
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    labels = [model.config.id2label[i].lower() for i in range(model.config.num_labels)]
+
+    probabilities = [None] * len(texts)
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            encoded = tokenizer([texts[i] for i in batch], padding=True, truncation=True,
+                                max_length=max_length, return_tensors='pt')
+            batch_probabilities = torch.softmax(model(**encoded).logits, dim=-1).tolist()
+            for i, row in zip(batch, batch_probabilities):
+                probabilities[i] = row
+
+    scores = pd.DataFrame(probabilities, columns=labels, index=index)
+    scores['label'] = scores[labels].idxmax(axis=1)
+    return scores
+
+
+def _score_vader_chunk(texts):
+    """Score a list of texts with VADER, one row of VADER_COLUMNS per text."""
+    analyzer = _get_analyzer()
+    rows = []
+    for text in texts:
+        scores = analyzer.polarity_scores(text)
+        rows.append([scores[column] for column in VADER_COLUMNS])
+    return rows
+
+
+def _score_textblob_chunk(texts):
+    """Score a list of texts with TextBlob, one row of TEXTBLOB_COLUMNS per text."""
+    from textblob import TextBlob
+    rows = []
+    for text in texts:
+        sentiment = TextBlob(text).sentiment
+        rows.append([sentiment.polarity, sentiment.subjectivity])
+    return rows
+
+
+BACKENDS = {
+    'vader': (_score_vader_chunk, VADER_COLUMNS),
+    'textblob': (_score_textblob_chunk, TEXTBLOB_COLUMNS),
+}
+
+
+def _init_worker(backend):
+    # Build the analyzer once per worker instead of once per chunk
+    if backend == 'vader':
+        _get_analyzer()
+
+
+@instrument.timed(rows=lambda texts, *args, **kwargs: len(texts))
+def _score_unique(texts, backend, workers, chunk_size, model_dir, batch_size, pool=None):
+    """Score a list of texts without caching and return a DataFrame."""
+    if backend == 'distilbert':
+        return score_distilbert(texts, model_dir, batch_size, threads=workers)
+    score_chunk, columns = BACKENDS[backend]
+    chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+    if pool is not None:
+        results = list(pool.map(score_chunk, chunks))
+    elif workers <= 1:
+        results = [score_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(backend,)) as pool:
+            results = list(pool.map(score_chunk, chunks))
+
+    rows = [row for chunk_rows in results for row in chunk_rows]
+    return pd.DataFrame(rows, columns=columns)
+
+
+@instrument.timed(rows=lambda texts, *args, **kwargs: len(texts))
+def score_texts(texts, backend='vader', workers=None, chunk_size=DEFAULT_CHUNK_SIZE, cache=None,
+                model_dir=None, batch_size=DEFAULT_BATCH_SIZE, pool=None):
+    """Score a sequence of texts and return a DataFrame with one row per text.
+
+    Each distinct text is scored once. With a ScoreCache, texts scored in an
+    earlier run are looked up instead of scored again. The remaining texts are
+    split into chunks of `chunk_size` and spread over a pool of `workers`
+    processes (defaults to the number of CPUs). Missing values are scored as
+    empty strings. The 'distilbert' backend runs in this process instead,
+    uses `workers` as its thread count and takes `model_dir`/`batch_size`.
+    A ProcessPoolExecutor started with _init_worker for the same backend can be
+    passed as `pool` to reuse its workers across calls.
+    """
+    if backend not in BACKENDS and backend != 'distilbert':
+        raise ValueError(f"Unknown sentiment backend '{backend}'. "
+                         f"Choose from: {', '.join(list(BACKENDS) + ['distilbert'])}.")
+    # Cached DistilBERT scores are only valid for the model that produced them
+    cache_key = f'distilbert:{model_dir or DISTILBERT_MODEL_DIR}' if backend == 'distilbert' else backend
+
+    index = texts.index if isinstance(texts, pd.Series) else None
+    texts = ['' if pd.isna(text) else str(text) for text in texts]
+    unique_texts = list(dict.fromkeys(texts))
+
+    known = cache.get_many(cache_key, unique_texts) if cache is not None else {}
+    missing = [text for text in unique_texts if text not in known]
+    if missing:
+        records = _score_unique(missing, backend, workers, chunk_size, model_dir, batch_size,
+                                pool).to_dict('records')
+        known.update(zip(missing, records))
+        if cache is not None:
+            cache.put_many(cache_key, missing, records)
+
+    columns = BACKENDS[backend][1] if backend in BACKENDS else None
+    return pd.DataFrame.from_records([known[text] for text in texts], index=index, columns=columns)
+
+
+class ScoreCache:
+    """Persistent store of sentiment scores keyed by backend and text hash.
+
+    Holds at most `max_entries` scores in an LRUStore.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=1_000_000):
+        self.path = path
+        self.store = lru_store.LRUStore(path, 'scores', ('backend', 'text_hash'), 'scores',
+                                        max_entries=max_entries)
+
+    @staticmethod
+    def _hash(text):
+        return hashlib.sha1(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+    def get_many(self, backend, texts):
+        """Return {text: scores} for the texts that are already cached."""
+        keys = {(backend, self._hash(text)): text for text in texts}
+        return {keys[key]: scores for key, scores in self.store.get_many(keys).items()}
+
+    def put_many(self, backend, texts, records):
+        """Store one scores record per text."""
+        self.store.put_many([((backend, self._hash(text)), record, ()) for text, record in zip(texts, records)])
+
+    def clear(self):
+        """Remove every cached score."""
+        self.store.clear()
+
+    def close(self):
+        self.store.close()
+
+
+def _progress_path(output_path):
+    return output_path.rstrip('/\\') + '.progress.json'
+
+
+def _load_progress(output_path, settings):
+    """Return the saved progress for output_path if it was made with the same settings."""
+    try:
+        with open(_progress_path(output_path)) as f:
+            progress = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if progress.get('settings') != settings:
+        return None
+    return progress
+
+
+def _save_progress(output_path, progress):
+    # Write to a temporary file first so a crash never leaves half a progress file
+    path = _progress_path(output_path)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(progress, f)
+    os.replace(path + '.tmp', path)
+
+
+def stream_sentiment(input_path, output_path, text_column='text_column', backend='vader',
+                     chunksize=DEFAULT_STREAM_CHUNK_SIZE, workers=None, encoding='ISO-8859-1', resume=True,
+                     cache=None):
+    """Score the text column of a CSV chunk by chunk and append the scores to output_path.
+
+    Only `chunksize` rows are held in memory at a time. An output path ending
+    in .parquet is written as a directory of one part file per chunk; anything
+    else is written as CSV. Progress is recorded after every chunk, so with
+    `resume=True` a rerun continues after the last completed chunk. An
+    optional ScoreCache is consulted before scoring each chunk.
+    Returns the total number of rows scored.
+    """
+    parquet = output_path.endswith('.parquet')
+    # The input's mtime and size make a rerun on a replaced file start over instead of resuming
+    stat = os.stat(input_path)
+    settings = {'input': os.path.abspath(input_path), 'input_mtime_ns': stat.st_mtime_ns,
+                'input_size': stat.st_size, 'text_column': text_column,
+                'backend': backend, 'chunksize': chunksize}
+    progress = _load_progress(output_path, settings) if resume else None
+    if progress is None:
+        progress = {'settings': settings, 'chunks_done': 0, 'rows_done': 0, 'output_bytes': 0}
+
+    if parquet:
+        os.makedirs(output_path, exist_ok=True)
+        # Drop part files from chunks that were not recorded as complete
+        for part in glob.glob(os.path.join(output_path, 'part-*.parquet')):
+            if int(os.path.basename(part)[5:-8]) >= progress['chunks_done']:
+                os.remove(part)
+    elif os.path.exists(output_path):
+        # Cut off anything written after the last completed chunk
+        with open(output_path, 'r+b') as f:
+            f.truncate(progress['output_bytes'])
+
+    if progress['rows_done']:
+        print(f"Resuming after {progress['chunks_done']} chunks ({progress['rows_done']} rows).")
+
+    reader = pd.read_csv(input_path, usecols=[text_column], chunksize=chunksize, encoding=encoding)
+    # One pool for the whole stream, so each worker builds its analyzer once rather than once per chunk
+    pool_workers = workers or os.cpu_count() or 1
+    pool = None
+    if backend in BACKENDS and pool_workers > 1:
+        pool = ProcessPoolExecutor(max_workers=pool_workers, initializer=_init_worker, initargs=(backend,))
+    with pool or contextlib.nullcontext():
+        for chunk_number, chunk in enumerate(reader):
+            if chunk_number < progress['chunks_done']:
+                continue  # Already scored; parsing is cheap next to scoring
+            scores = score_texts(chunk[text_column], backend, workers, cache=cache, pool=pool)
+            scores.index = pd.RangeIndex(progress['rows_done'], progress['rows_done'] + len(chunk), name='row')
+
+            with instrument.step('gex5.write_scores', rows=len(scores)):
+                if parquet:
+                    scores.to_parquet(os.path.join(output_path, f"part-{progress['chunks_done']:05d}.parquet"))
+                else:
+                    scores.to_csv(output_path, mode='a', header=progress['output_bytes'] == 0)
+                    progress['output_bytes'] = os.path.getsize(output_path)
+
+            progress['chunks_done'] += 1
+            progress['rows_done'] += len(chunk)
+            _save_progress(output_path, progress)
+            print(f"Scored {progress['rows_done']} rows...")
+
+    return progress['rows_done']
+
 
 class SentimentAnalysis:
-    def __init__(self):
-        self.analyzer = SentimentIntensityAnalyzer()
+    def __init__(self, text_column='text_column', workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 cache_path=DEFAULT_CACHE_PATH):
+        self.text_column = text_column
+        self.workers = workers
+        self.chunk_size = chunk_size
+        # Pass cache_path=None to always score from scratch
+        self.cache = ScoreCache(cache_path) if cache_path else None
+
+    @property
+    def analyzer(self):
+        """The VADER analyzer, built the first time it is needed."""
+        return _get_analyzer()
 
     def load_data(self, data):
         """Load the dataset to be analyzed for sentiment."""
         self.data = data
 
+    def has_text_data(self):
+        """Check that the dataset has a text column of suitable length."""
+        return self.text_column in self.data.columns and self.data[self.text_column].str.len().mean() > 5
+
+    def vader_scores(self):
+        """Return VADER compound/pos/neg/neu scores for the text column."""
+        return score_texts(self.data[self.text_column], 'vader', self.workers, self.chunk_size, self.cache)
+
+    def textblob_scores(self):
+        """Return TextBlob polarity/subjectivity scores for the text column."""
+        return score_texts(self.data[self.text_column], 'textblob', self.workers, self.chunk_size, self.cache)
+
+    def distilbert_scores(self, model_dir=None, batch_size=DEFAULT_BATCH_SIZE, threads=None):
+        """Return DistilBERT label probabilities for the text column."""
+        return score_texts(self.data[self.text_column], 'distilbert', threads or self.workers,
+                           cache=self.cache, model_dir=model_dir, batch_size=batch_size)
+
     def vader_sentiment_analysis(self):
         """Perform VADER sentiment analysis on the dataset."""
-        if 'text_column' in self.data.columns and self.data['text_column'].str.len().mean() > 5:  # Checking for suitable length
+        if self.has_text_data():
             print("Performing VADER sentiment analysis...")
-            for index, row in self.data.iterrows():
-                text = row['text_column']
-                sentiment_scores = self.analyzer.polarity_scores(text)
-                print(f"Text: {text}\nSentiment Scores: {sentiment_scores}")
-        else:
-            print("Looking for text data in your dataset…")
-            print("Sorry, your dataset does not have a suitable length text data.")
-            print("Therefore, Sentiment Analysis is not possible. Returning to previous menu...")
+            scores = self.vader_scores()
+            print(pd.concat([self.data[self.text_column], scores], axis=1))
+            return scores
+        self._report_no_text_data()
 
     def textblob_sentiment_analysis(self):
         """Perform TextBlob sentiment analysis on the dataset."""
-        if 'text_column' in self.data.columns and self.data['text_column'].str.len().mean() > 5:  # Checking for suitable length
+        if self.has_text_data():
             print("Performing TextBlob sentiment analysis...")
-            for index, row in self.data.iterrows():
-                text = row['text_column']
-                blob = TextBlob(text)
-                sentiment = blob.sentiment
-                print(f"Text: {text}\nPolarity: {sentiment.polarity}, Subjectivity: {sentiment.subjectivity}")
-        else:
-            print("Looking for text data in your dataset…")
-            print("Sorry, your dataset does not have a suitable length text data.")
-            print("Therefore, Sentiment Analysis is not possible. Returning to previous menu...")
+            scores = self.textblob_scores()
+            print(pd.concat([self.data[self.text_column], scores], axis=1))
+            return scores
+        self._report_no_text_data()
+
+    def distilbert_sentiment_analysis(self, model_dir=None, batch_size=DEFAULT_BATCH_SIZE, threads=None):
+        """Perform DistilBERT sentiment analysis on the dataset."""
+        if self.has_text_data():
+            print("Performing DistilBERT sentiment analysis...")
+            try:
+                scores = self.distilbert_scores(model_dir, batch_size, threads)
+            except ImportError:
+                print("DistilBERT needs the 'transformers' and 'torch' packages. Returning to previous menu...")
+                return
+            except OSError as e:
+                print(f"Could not load the DistilBERT model from '{model_dir or DISTILBERT_MODEL_DIR}': {e}")
+                print("Set DISTILBERT_MODEL_DIR to a local model directory. Returning to previous menu...")
+                return
+            print(pd.concat([self.data[self.text_column], scores], axis=1))
+            return scores
+        self._report_no_text_data()
+
+    def _report_no_text_data(self):
+        print("Looking for text data in your dataset…")
+        print("Sorry, your dataset does not have a suitable length text data.")
+        print("Therefore, Sentiment Analysis is not possible. Returning to previous menu...")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream sentiment scores for a large CSV file.")
+    parser.add_argument('input', help="CSV file containing the text column")
+    parser.add_argument('output', help="Output file (.csv, or .parquet for a directory of part files)")
+    parser.add_argument('--column', default='text_column', help="Name of the text column")
+    parser.add_argument('--backend', default='vader', choices=sorted(BACKENDS) + ['distilbert'])
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_STREAM_CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--no-resume', action='store_true', help="Start over instead of resuming")
+    parser.add_argument('--cache', default=None, help="SQLite score cache to reuse across runs")
+    args = parser.parse_args()
+    stream_sentiment(args.input, args.output, args.column, args.backend, args.chunksize,
+                     args.workers, resume=not args.no_resume,
+                     cache=ScoreCache(args.cache) if args.cache else None)
@@ -0,0 +1,147 @@
+"""Dataset-level cache of factorized categorical columns and their row partitions.
+
+Group-comparison tests (ANOVA, Kruskal-Wallis, t-test) all need the rows of each
+group of a categorical column. group_index() factorizes a column once per
+DataFrame and keeps the row positions sorted by group, so every later test on
+that column only slices. cached_for_column() keeps any other per-column value
+with the frame the same way (normality.py caches its summaries there).
+Entries are rebuilt automatically when the column is replaced or written to.
+With copy-on-write (always on from pandas 3) a write gives the column new data,
+so checking that costs nothing; without it, column_token() also checksums the
+column (its codes for category columns). invalidate() frees cached values early.
+"""
+import weakref
+import zlib
+
+import numpy as np
+import pandas as pd
+
+import instrument
+
+# Named PandasArray before pandas 2.1
+_NumpyArray = getattr(pd.arrays, 'NumpyExtensionArray', None) or pd.arrays.PandasArray
+
+# id(DataFrame) -> (weak reference to the frame, {(column, key): _Entry})
+_caches = {}
+
+
+class GroupIndex:
+    """Row positions of each group of a categorical column, computed in one pass."""
+
+    def __init__(self, series):
+        # Groups keep their order of first appearance, like Series.unique()
+        self.codes, self.labels = pd.factorize(series)
+        self.counts = np.bincount(self.codes[self.codes >= 0], minlength=len(self.labels))
+        order = np.argsort(self.codes, kind='stable')
+        # Missing values have code -1 and sort first; leave them out
+        self.order = order[len(order) - self.counts.sum():]
+        self.bounds = np.concatenate(([0], np.cumsum(self.counts)))
+
+    def __len__(self):
+        return len(self.labels)
+
+    def positions(self, group_number):
+        """Return the row positions of one group."""
+        return self.order[self.bounds[group_number]:self.bounds[group_number + 1]]
+
+    def split(self, values, dropna=True):
+        """Split an array aligned with the column into one array per group."""
+        values = np.asarray(values)[self.order]
+        if dropna:
+            present = ~pd.isna(values)
+            bounds = np.concatenate(([0], np.cumsum(present)))[self.bounds]
+            values = values[present]
+        else:
+            bounds = self.bounds
+        return np.split(values, bounds[1:-1])
+
+
+class _Entry:
+    def __init__(self, series, build):
+        # Holding the column means a copy-on-write frame copies it before any
+        # in-place change, so the token below changes too
+        self.series = series
+        self.token = column_token(series)
+        self.value = build(series)
+
+
+def _copy_on_write():
+    """Return True if pandas copies shared column data before any in-place change."""
+    if int(pd.__version__.split('.')[0]) >= 3:
+        return True
+    try:
+        return pd.get_option('mode.copy_on_write') is True
+    except KeyError:
+        return False  # pandas older than 1.5
+
+
+def _checksum(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        values = series.cat.codes.to_numpy()
+    else:
+        values = series.to_numpy()
+    if values.dtype == object:
+        values = pd.util.hash_array(values)
+    return zlib.crc32(np.ascontiguousarray(values))
+
+
+def column_token(series):
+    """Return a value that changes when the data behind a column is replaced or written to."""
+    array = series.array
+    if isinstance(array, _NumpyArray):
+        values = series.to_numpy()
+        token = (len(values), values.__array_interface__['data'][0])
+    else:
+        token = (len(array), id(array))
+    if not _copy_on_write():
+        # An in-place write keeps the same buffer, so compare the contents too
+        token += (_checksum(series),)
+    return token
+
+
+def frame_cache(data):
+    """Return the dict of values cached with a DataFrame, dropped when the frame is garbage collected."""
+    key = id(data)
+    entry = _caches.get(key)
+    if entry is None or entry[0]() is not data:
+        entry = (weakref.ref(data, lambda ref: _caches.pop(key, None)), {})
+        _caches[key] = entry
+    return entry[1]
+
+
+def cached_for_column(data, column, key, build):
+    """Return build(data[column]), cached with the frame under (column, key) until the column changes."""
+    cache = frame_cache(data)
+    series = data[column]
+    entry = cache.get((column, key))
+    if entry is None or entry.token != column_token(series):
+        entry = cache[(column, key)] = _Entry(series, build)
+    return entry.value
+
+
+def _build_index(series):
+    with instrument.step('groups.build_index', rows=len(series)):
+        return GroupIndex(series)
+
+
+def group_index(data, column):
+    """Return the cached GroupIndex of a column, rebuilding it if the column changed."""
+    return cached_for_column(data, column, 'group_index', _build_index)
+
+
+def group_values(data, continuous_var, categorical_var):
+    """Return the non-missing values of continuous_var for each group of categorical_var."""
+    values = data[continuous_var].to_numpy(dtype=float, na_value=np.nan)
+    return group_index(data, categorical_var).split(values)
+
+
+def invalidate(data, column=None):
+    """Forget everything cached for one column, or for every column, of a DataFrame."""
+    cache = _caches.get(id(data))
+    if cache is None or cache[0]() is not data:
+        return
+    if column is None:
+        cache[1].clear()
+    else:
+        for key in [key for key in cache[1] if key[0] == column]:
+            del cache[1][key]
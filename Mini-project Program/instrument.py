@@ -0,0 +1,205 @@
+"""Timing hooks for the analysis steps: wall time, CPU time, rows and memory.
+
+Wrap a step in `with instrument.step('name', rows=n):` or decorate a function
+with `@instrument.timed('name', rows=...)`. While instrumentation is enabled,
+every step adds its wall time, CPU time, row count and change in resident
+memory to an in-process registry (see metrics() and report()), and with a
+trace path it also appends one JSON line per step. Steps nest; each trace
+record names its parent step.
+
+Instrumentation is off by default, and then a step costs one flag check.
+Turn it on with enable(), or for main.py by setting ANALYSIS_METRICS=1 (to
+print a report at exit) and/or ANALYSIS_TRACE=<file.jsonl>.
+"""
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+_enabled = False
+_trace = None  # Open JSON-lines trace file, or None
+_metrics = {}  # name -> {'calls', 'wall', 'cpu', 'rows', 'memory_mb'}
+_lock = threading.Lock()
+_local = threading.local()  # Per-thread stack of open step names
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def _rss_mb():
+    """Resident memory of this process in MB (peak RSS where the current value isn't available)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / 2 ** 20
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+class _NullStep:
+    """Stands in for a Step while instrumentation is off."""
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_STEP = _NullStep()
+
+
+class Step:
+    """A timed block; set `rows` inside the block if the count is only known there."""
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1] if stack else None
+        stack.append(self.name)
+        self.memory = _rss_mb()
+        self.cpu = time.process_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self.start
+        cpu = time.process_time() - self.cpu
+        memory = _rss_mb() - self.memory
+        _local.stack.pop()
+        _record(self.name, self.parent, wall, cpu, self.rows, memory,
+                exc_type.__name__ if exc_type else None)
+        return False
+
+
+def _record(name, parent, wall, cpu, rows, memory, error):
+    with _lock:
+        entry = _metrics.get(name)
+        if entry is None:
+            entry = _metrics[name] = {'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'rows': 0, 'memory_mb': 0.0}
+        entry['calls'] += 1
+        entry['wall'] += wall
+        entry['cpu'] += cpu
+        entry['rows'] += rows or 0
+        entry['memory_mb'] += memory
+        if _trace is not None:
+            record = {'name': name, 'parent': parent, 'time': time.time(), 'wall': wall, 'cpu': cpu,
+                      'rows': rows, 'memory_mb': memory}
+            if error:
+                record['error'] = error
+            _trace.write(json.dumps(record) + '\n')
+
+
+def step(name, rows=None):
+    """Context manager timing the enclosed block as `name`."""
+    if not _enabled:
+        return _NULL_STEP
+    return Step(name, rows)
+
+
+def timed(name=None, rows=None):
+    """Decorator timing every call of a function.
+
+    `rows` is either a callable taking the function's arguments and returning
+    the row count, or the name of an attribute of the first argument (such as
+    'data' for a method working on self.data) whose length is the row count.
+    """
+    def decorate(func):
+        step_name = name or f'{func.__module__}.{func.__qualname__}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Step(step_name, _count_rows(rows, args, kwargs)):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _count_rows(rows, args, kwargs):
+    if rows is None:
+        return None
+    try:
+        if callable(rows):
+            return rows(*args, **kwargs)
+        return len(getattr(args[0], rows))
+    except Exception:
+        return None  # A missing count shouldn't break the step being timed
+
+
+def enable(trace_path=None):
+    """Start recording steps, appending them to trace_path as JSON lines if given."""
+    global _enabled, _trace
+    if trace_path and _trace is None:
+        _trace = open(trace_path, 'a', buffering=1)
+    _enabled = True
+
+
+def disable():
+    """Stop recording steps and close the trace file."""
+    global _enabled, _trace
+    _enabled = False
+    if _trace is not None:
+        _trace.close()
+        _trace = None
+
+
+def enable_from_environment():
+    """Turn on instrumentation if ANALYSIS_METRICS or ANALYSIS_TRACE is set."""
+    trace_path = os.environ.get('ANALYSIS_TRACE')
+    if os.environ.get('ANALYSIS_METRICS'):
+        atexit.register(report)
+    elif not trace_path:
+        return
+    enable(trace_path)
+
+
+def is_enabled():
+    return _enabled
+
+
+def metrics():
+    """Return a copy of the registry: {name: {'calls', 'wall', 'cpu', 'rows', 'memory_mb'}}."""
+    with _lock:
+        return {name: dict(entry) for name, entry in _metrics.items()}
+
+
+def reset():
+    """Clear the registry."""
+    with _lock:
+        _metrics.clear()
+
+
+def report(file=None):
+    """Print the registry as a table, slowest steps first."""
+    entries = sorted(metrics().items(), key=lambda item: item[1]['wall'], reverse=True)
+    if not entries:
+        return
+    print(f"\n{'step':<40} {'calls':>6} {'wall s':>9} {'cpu s':>9} {'rows':>11} {'mem MB':>8}", file=file)
+    for name, entry in entries:
+        print(f"{name:<40} {entry['calls']:>6} {entry['wall']:>9.3f} {entry['cpu']:>9.3f} "
+              f"{entry['rows']:>11} {entry['memory_mb']:>8.1f}", file=file)
+
+
+atexit.register(disable)
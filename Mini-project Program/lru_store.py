@@ -0,0 +1,90 @@
+"""SQLite table of JSON values capped at a number of entries, evicting the least recently used.
+
+Shared by gex5.ScoreCache (sentiment scores) and result_cache.ResultCache
+(test results). Each row holds the key columns, any extra columns, the value
+as JSON and the time it was last read or written.
+"""
+import json
+import os
+import sqlite3
+import time
+
+# Keys looked up per query, to stay below SQLite's limit on query parameters
+BATCH_SIZE = 400
+
+
+class LRUStore:
+    """Maps key tuples to JSON values in one SQLite table, holding at most `max_entries` of them."""
+
+    def __init__(self, path, table, key_columns, value_column='value', extra_columns=(),
+                 max_entries=1_000_000, json_default=None):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.table = table
+        self.key_columns = tuple(key_columns)
+        self.value_column = value_column
+        self.max_entries = max_entries
+        self.json_default = json_default
+        self.connection = sqlite3.connect(path)
+        columns = ', '.join(f'{column} TEXT' for column in self.key_columns + tuple(extra_columns))
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            f"{columns}, {value_column} TEXT, last_used REAL, PRIMARY KEY ({', '.join(self.key_columns)}))")
+        self.connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_used ON {table} (last_used)")
+        self.connection.commit()
+
+    def get_many(self, keys):
+        """Return {key tuple: value} for the keys that are stored, marking them as used."""
+        # Group keys by their leading columns and match those with `=` and the
+        # last column with IN, so SQLite searches the primary key instead of
+        # scanning the table (which it does for a row-value IN over all columns)
+        by_prefix = {}
+        for key in keys:
+            key = tuple(key)
+            by_prefix.setdefault(key[:-1], []).append(key[-1])
+        found = {}
+        *leading, last = self.key_columns
+        leading_condition = ''.join(f'{column} = ? AND ' for column in leading)
+        for prefix, values in by_prefix.items():
+            for start in range(0, len(values), BATCH_SIZE):
+                batch = values[start:start + BATCH_SIZE]
+                rows = self.connection.execute(
+                    f"SELECT {last}, {self.value_column} FROM {self.table} "
+                    f"WHERE {leading_condition}{last} IN ({','.join('?' * len(batch))})",
+                    prefix + tuple(batch))
+                for value_key, value in rows:
+                    found[prefix + (value_key,)] = json.loads(value)
+        if found:
+            now = time.time()
+            condition = ' AND '.join(f'{column} = ?' for column in self.key_columns)
+            self.connection.executemany(
+                f"UPDATE {self.table} SET last_used = ? WHERE {condition}",
+                [(now,) + key for key in found])
+            self.connection.commit()
+        return found
+
+    def put_many(self, entries):
+        """Store (key tuple, value, extra column tuple) entries and evict the oldest over the cap."""
+        if not entries:
+            return
+        now = time.time()
+        placeholders = ','.join('?' * (len(self.key_columns) + len(entries[0][2]) + 2))
+        self.connection.executemany(
+            f"INSERT OR REPLACE INTO {self.table} VALUES ({placeholders})",
+            [tuple(key) + tuple(extra) + (json.dumps(value, default=self.json_default), now)
+             for key, value, extra in entries])
+        excess = self.connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self.connection.execute(
+                f"DELETE FROM {self.table} WHERE rowid IN "
+                f"(SELECT rowid FROM {self.table} ORDER BY last_used LIMIT ?)", (excess,))
+        self.connection.commit()
+
+    def clear(self):
+        """Remove every entry."""
+        self.connection.execute(f"DELETE FROM {self.table}")
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
@@ -1,13 +1,22 @@
-import gex2  # Data Inspection module
-import gex3  # ANOVA module
-import gex4  # t-Test, Chi-Square, Regression module
-import gex5  # Sentiment Analysis module
-import pandas as pd  # For handling the dataset
-import scipy.stats as stats
-import matplotlib.pyplot as plt
-import statsmodels.api as sm
+# Analysis modules and their heavy dependencies (pandas, scipy, matplotlib,
+# statsmodels, vaderSentiment, ...) are imported where they are first used,
+# so the first prompt appears without waiting for them:
+#   gex2     Data Inspection module
+#   gex3     ANOVA module
+#   gex4     t-Test, Chi-Square, Regression module
+#   gex5     Sentiment Analysis module
+#   loader   Dataset loading with a Parquet cache
+#   groups   Cached group partitions for group-comparison tests
+#   plotting Interactive or background-rendered figures
+#   normality Sample-based normality tests for the ANOVA/Kruskal-Wallis choice
+# instrument (timing hooks) and result_cache (stored test results) only use the
+# standard library, so they are cheap enough to import here.
+import instrument
+import result_cache
 
 def perform_analysis(data, dataset_path):
+    # Tests already run on this unchanged dataset, in this or an earlier session, are looked up
+    results = result_cache.ResultCache().for_dataset(data, dataset_path)
     while True:
         # Step 1: Show analysis options
         print("\nChoose the analysis you want to perform:")
@@ -44,6 +53,7 @@ def perform_analysis(data, dataset_path):
                     elif 1 <= selected <= len(numeric_columns):
                         variable = numeric_columns[selected - 1]
                         # Create an instance of DataInspection and load data
+                        import gex2
                         inspector = gex2.DataInspection()
                         inspector.df = data  # Assign the dataframe directly
                         inspector.plot_histogram(variable)
@@ -62,11 +72,11 @@ def perform_analysis(data, dataset_path):
             categorical_var = select_variable(categorical_columns, "categorical")
 
             # Check for normality using Q-Q plot
-            if not check_normality(data[continuous_var]):
+            if not check_normality(data, continuous_var, results):
                 print(f"{continuous_var} is not normally distributed. Performing Kruskal-Wallis Test instead.")
-                perform_kruskal_wallis_test(data, continuous_var, categorical_var)
+                perform_kruskal_wallis_test(data, continuous_var, categorical_var, results)
             else:
-                perform_anova(data, continuous_var, categorical_var)
+                perform_anova(data, continuous_var, categorical_var, results)
             continue  # Return to analysis options
 
         elif choice == '3':
@@ -77,7 +87,8 @@ def perform_analysis(data, dataset_path):
             continuous_var = select_variable(numeric_columns, "continuous")
             categorical_var = select_variable(categorical_columns, "categorical")
             
-            stats_test = gex4.StatisticalTests(data)
+            import gex4
+            stats_test = gex4.StatisticalTests(data, results)
             stats_test.perform_tests(continuous_var, categorical_var)  # Perform t-Test
             continue  # Return to analysis options
 
@@ -88,7 +99,8 @@ def perform_analysis(data, dataset_path):
             categorical_var1 = select_variable(categorical_columns, "first categorical")
             categorical_var2 = select_variable(categorical_columns, "second categorical")
             
-            stats_test = gex4.StatisticalTests(data)
+            import gex4
+            stats_test = gex4.StatisticalTests(data, results)
             stats_test.perform_chisquare(categorical_var1, categorical_var2)  # Perform Chi-Square test
             continue  # Return to analysis options
 
@@ -99,12 +111,16 @@ def perform_analysis(data, dataset_path):
             dependent_var = select_variable(numeric_columns, "dependent")
             independent_var = select_variable(numeric_columns, "independent")
             
-            regression_test = gex4.StatisticalTests(data)
-            regression_test.perform_regression(dependent_var, independent_var)  # Perform regression analysis
+            detailed = input("Show the full statsmodels summary? (y/N): ").strip().lower() == 'y'
+
+            import gex4
+            regression_test = gex4.StatisticalTests(data, results)
+            regression_test.perform_regression(dependent_var, independent_var, detailed)  # Perform regression analysis
             continue  # Return to analysis options
 
         elif choice == '6':
             # Sentiment Analysis
+            import gex5
             sentiment = gex5.SentimentAnalysis()
             sentiment.load_data(data)  # Load the data for sentiment analysis
             sentiment_type = input("Choose sentiment analysis type (1: VADER, 2: TextBlob, 3: DistilBERT): ")
@@ -138,34 +154,44 @@ def select_variable(variable_list, variable_type):
         except ValueError:
             print("Invalid input. Please enter a valid number.")
 
-# Function to perform normality check using Q-Q plot
-def check_normality(variable_data):
-    sm.qqplot(variable_data, line='s')
-    plt.title('Q-Q Plot for Normality Check')
-    plt.show()
+# Function to perform normality check, with an optional Q-Q plot
+@instrument.timed('main.check_normality', rows=lambda data, *args: len(data))
+def check_normality(data, variable, results=None):
+    import normality
+
+    # Shapiro-Wilk on at most 5000 sampled values, plus D'Agostino and Anderson-Darling
+    if results is None:
+        result = normality.assess(data, variable)
+    else:
+        result = results.cached('normality', [variable], {}, lambda: normality.assess(data, variable))
+    for line in normality.describe(result):
+        print(line)
+
+    if input("Show a Q-Q plot? (y/N): ").strip().lower() == 'y':
+        with instrument.step('main.qqplot', rows=len(data)):
+            normality.qq_plot(data, variable, 'Q-Q Plot for Normality Check')
 
-    # Perform Shapiro-Wilk test for normality
-    stat, p = stats.shapiro(variable_data)
-    print(f'Shapiro-Wilk Test: statistic={stat}, p-value={p}')
-    
     # If p-value is less than 0.05, data is not normally distributed
-    return p > 0.05
+    return result['normal']
 
 # Function to perform ANOVA
-def perform_anova(data, continuous_var, categorical_var):
+@instrument.timed('main.perform_anova', rows=lambda data, *args: len(data))
+def perform_anova(data, continuous_var, categorical_var, results=None):
     print(f"Performing ANOVA on {continuous_var} and {categorical_var}...")
-    anova = gex3.DataAnalysis(data)
+    import gex3
+    anova = gex3.DataAnalysis(data, results)
     anova.perform_anova(continuous_var, categorical_var)
 
 # Function to perform Kruskal-Wallis Test
-def perform_kruskal_wallis_test(data, continuous_var, categorical_var):
+@instrument.timed('main.perform_kruskal_wallis_test', rows=lambda data, *args: len(data))
+def perform_kruskal_wallis_test(data, continuous_var, categorical_var, results=None):
     print(f"Performing Kruskal-Wallis Test on {continuous_var} and {categorical_var}...")
 
-    groups = data[categorical_var].unique()
-    group_data = [data[data[categorical_var] == group][continuous_var] for group in groups]
+    import gex3
 
-    # Perform Kruskal-Wallis Test
-    stat, p = stats.kruskal(*group_data)
+    # Perform Kruskal-Wallis Test (or look up the stored result)
+    result = gex3.DataAnalysis(data, results).compute_kruskal_wallis(continuous_var, categorical_var)
+    stat, p = result['statistic'], result['p_value']
     print(f'Kruskal-Wallis Test: statistic={stat}, p-value={p}')
 
     if p < 0.05:
@@ -177,9 +203,17 @@ def main():
     # Get dataset path from the user
     dataset_path = input("Enter the path to your dataset (CSV format): ")
 
+    import loader
+    import plotting
+
+    # Write figures to files instead of opening windows if ANALYSIS_RENDER_DIR is set
+    plotting.enable_from_environment()
+    # Record step timings if ANALYSIS_METRICS or ANALYSIS_TRACE is set
+    instrument.enable_from_environment()
+
     try:
-        # Load the CSV file
-        data = pd.read_csv(dataset_path, encoding='ISO-8859-1')
+        # Load the CSV file (from its Parquet cache if unchanged since last time)
+        data = loader.load_dataset(dataset_path, encoding='ISO-8859-1')
         print("\nHere are the first 5 rows of the dataset:\n")
         print(data.head())
 
@@ -0,0 +1,183 @@
+"""Normality checks whose cost doesn't grow with the number of rows.
+
+A column is summarized once, in chunks, by a profiling.ProfileAccumulator:
+count and central moments of every value, plus a seeded uniform sample of
+SAMPLE_SIZE values. From that summary:
+
+- Shapiro-Wilk runs on the whole column up to SHAPIRO_MAX_N values (where the
+  sample holds all of them), and on the sample beyond that, since SciPy's
+  p-values are unreliable for larger n. Its p-value decides `normal`.
+- D'Agostino-Pearson K² is computed from the moments of the whole column.
+- Anderson-Darling runs on the sample.
+- Skewness and excess kurtosis come from the moments of the whole column.
+
+Called with a DataFrame and a column name, the summary is cached with the
+frame by groups.cached_for_column(), next to the group indexes: while the
+column is unchanged, repeated checks (such as the ANOVA vs Kruskal-Wallis
+decision in main.py) only rerun the fixed-size tests, and the cache entry
+goes when the frame is garbage collected. Values passed on their own are summarized every time.
+"""
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+import groups
+import instrument
+import profiling
+
+SHAPIRO_MAX_N = 5000
+SAMPLE_SIZE = SHAPIRO_MAX_N
+CHUNK_ROWS = 1_000_000
+ALPHA = 0.05
+
+
+def summarize(values, sample_size=SAMPLE_SIZE, seed=0, chunk_size=CHUNK_ROWS):
+    """Return a ProfileAccumulator holding the moments and a sample of a numeric column."""
+    series = pd.Series(values, name='value' if getattr(values, 'name', None) is None else values.name)
+    accumulator = profiling.ProfileAccumulator(sample_size, seed)
+    for start in range(0, len(series), chunk_size):
+        accumulator.update(series.iloc[start:start + chunk_size].to_frame())
+    return accumulator
+
+
+def summarize_csv(path, column, sample_size=SAMPLE_SIZE, seed=0, chunksize=CHUNK_ROWS, encoding='ISO-8859-1'):
+    """Summarize one column of a CSV without loading the file into memory."""
+    accumulator = profiling.ProfileAccumulator(sample_size, seed)
+    for chunk in pd.read_csv(path, usecols=[column], chunksize=chunksize, encoding=encoding):
+        accumulator.update(chunk)
+    return accumulator
+
+
+def _summary_of(data, column, sample_size, seed):
+    if column is None:
+        return summarize(data, sample_size, seed)
+    return groups.cached_for_column(data, column, ('normality', sample_size, seed),
+                                    lambda series: summarize(series, sample_size, seed))
+
+
+def _sample_of(accumulator, i=0):
+    values = accumulator.sample[:, i]
+    return values[~np.isnan(values)]
+
+
+def dagostino_pearson(n, m2, m3, m4):
+    """D'Agostino-Pearson K² test from the count and central moment sums; returns (statistic, p-value).
+
+    Matches stats.normaltest on the same values, without needing the values.
+    """
+    skew = np.sqrt(n) * m3 / m2 ** 1.5
+    kurtosis = n * m4 / m2 ** 2
+
+    # Skewness test, as stats.skewtest
+    y = skew * np.sqrt((n + 1) * (n + 3) / (6.0 * (n - 2)))
+    beta2 = 3.0 * (n * n + 27 * n - 70) * (n + 1) * (n + 3) / ((n - 2.0) * (n + 5) * (n + 7) * (n + 9))
+    w2 = -1 + np.sqrt(2 * (beta2 - 1))
+    delta = 1 / np.sqrt(0.5 * np.log(w2))
+    alpha = np.sqrt(2.0 / (w2 - 1))
+    y = y if y != 0 else 1.0
+    z_skew = delta * np.log(y / alpha + np.sqrt((y / alpha) ** 2 + 1))
+
+    # Kurtosis test, as stats.kurtosistest
+    expected = 3.0 * (n - 1) / (n + 1)
+    variance = 24.0 * n * (n - 2) * (n - 3) / ((n + 1) * (n + 1.0) * (n + 3) * (n + 5))
+    x = (kurtosis - expected) / np.sqrt(variance)
+    sqrt_beta1 = 6.0 * (n * n - 5 * n + 2) / ((n + 7) * (n + 9)) * np.sqrt(6.0 * (n + 3) * (n + 5) / (n * (n - 2) * (n - 3)))
+    a = 6.0 + 8.0 / sqrt_beta1 * (2.0 / sqrt_beta1 + np.sqrt(1 + 4.0 / sqrt_beta1 ** 2))
+    denominator = 1 + x * np.sqrt(2 / (a - 4.0))
+    term = np.sign(denominator) * ((1 - 2.0 / a) / abs(denominator)) ** (1 / 3.0) if denominator else np.nan
+    z_kurtosis = (1 - 2 / (9.0 * a) - term) / np.sqrt(2 / (9.0 * a))
+
+    statistic = z_skew ** 2 + z_kurtosis ** 2
+    return statistic, stats.chi2.sf(statistic, 2)
+
+
+def anderson_darling(values):
+    """Anderson-Darling test for normality with estimated mean and variance; returns (statistic, p-value).
+
+    The statistic matches stats.anderson(values, 'norm'); the p-value uses the
+    D'Agostino & Stephens (1986) approximation for the adjusted statistic.
+    """
+    values = np.sort(values)
+    n = len(values)
+    z = (values - values.mean()) / values.std(ddof=1)
+    i = np.arange(1, n + 1)
+    statistic = -n - np.sum((2 * i - 1) / n * (stats.norm.logcdf(z) + stats.norm.logsf(z[::-1])))
+    adjusted = statistic * (1 + 0.75 / n + 2.25 / n ** 2)
+    if adjusted >= 0.6:
+        p = np.exp(1.2937 - 5.709 * adjusted + 0.0186 * adjusted ** 2)
+    elif adjusted >= 0.34:
+        p = np.exp(0.9177 - 4.279 * adjusted - 1.38 * adjusted ** 2)
+    elif adjusted >= 0.2:
+        p = 1 - np.exp(-8.318 + 42.796 * adjusted - 59.938 * adjusted ** 2)
+    else:
+        p = 1 - np.exp(-13.436 + 101.14 * adjusted - 223.73 * adjusted ** 2)
+    return statistic, min(max(p, 0.0), 1.0)
+
+
+def assess_summary(accumulator, column=None, alpha=ALPHA):
+    """Run the normality tests on a summarized column and return the results as a dict."""
+    if not accumulator.numeric_columns:
+        # Nothing numeric was summarized, e.g. an empty column
+        return {'test': 'normality', 'n': 0, 'sample_size': 0, 'sampled': False, 'skew': np.nan,
+                'kurtosis': np.nan, 'normal': False, 'p_value': np.nan}
+    column = accumulator.numeric_columns[0] if column is None else column
+    i = accumulator.numeric_columns.index(column)
+    n, m2, m3, m4 = accumulator.count[i], accumulator.m2[i], accumulator.m3[i], accumulator.m4[i]
+    sample = _sample_of(accumulator, i)
+    summary = accumulator.summary().loc[column]
+
+    result = {'test': 'normality', 'n': int(n), 'sample_size': len(sample), 'sampled': bool(len(sample) < n),
+              'skew': summary['skew'], 'kurtosis': summary['kurtosis']}
+    if len(sample) < 3 or m2 == 0:
+        # Too few or constant values: no test applies
+        return {**result, 'normal': False, 'p_value': np.nan}
+
+    result['shapiro_statistic'], result['shapiro_p'] = stats.shapiro(sample)
+    if n >= 20:
+        result['dagostino_statistic'], result['dagostino_p'] = dagostino_pearson(n, m2, m3, m4)
+    result['anderson_statistic'], result['anderson_p'] = anderson_darling(sample)
+    result['p_value'] = result['shapiro_p']
+    result['normal'] = bool(result['shapiro_p'] > alpha)
+    return result
+
+
+@instrument.timed('normality.assess', rows=lambda data, *args, **kwargs: len(data))
+def assess(data, column=None, alpha=ALPHA, sample_size=SAMPLE_SIZE, seed=0):
+    """Check data[column], or the values in data if column is None, for normality.
+
+    See the module docstring for the tests used and for caching.
+    """
+    return assess_summary(_summary_of(data, column, sample_size, seed), alpha=alpha)
+
+
+def sample_values(data, column=None, sample_size=SAMPLE_SIZE, seed=0):
+    """Return the non-missing values of a column, or the seeded sample that assess() tests beyond sample_size."""
+    return _sample_of(_summary_of(data, column, sample_size, seed))
+
+
+def qq_plot(data, column=None, title=None, sample_size=SAMPLE_SIZE, seed=0):
+    """Draw a normal Q-Q plot of a column, from its sample when it is larger than sample_size."""
+    import matplotlib.pyplot as plt
+    import plotting
+    name = column if column is not None else getattr(data, 'name', None) or 'values'
+    plt.figure(figsize=(6, 6))
+    stats.probplot(sample_values(data, column, sample_size, seed), dist="norm", plot=plt)
+    plt.title(title or f"Q-Q Plot for {name}")
+    plotting.show(f"qq-{name}")
+
+
+def describe(result):
+    """Return printable lines summarizing an assess() result."""
+    if 'shapiro_p' not in result:
+        return [f"Not enough distinct values for a normality test (n = {result['n']})."]
+    if result['sampled']:
+        shapiro = f"Shapiro-Wilk Test on a random sample of {result['sample_size']} of {result['n']} values"
+    else:
+        shapiro = 'Shapiro-Wilk Test'
+    lines = [f"{shapiro}: statistic={result['shapiro_statistic']}, p-value={result['shapiro_p']}"]
+    if 'dagostino_p' in result:
+        lines.append(f"D'Agostino-Pearson Test: statistic={result['dagostino_statistic']}, "
+                     f"p-value={result['dagostino_p']}")
+    lines.append(f"Anderson-Darling Test: statistic={result['anderson_statistic']}, p-value={result['anderson_p']}")
+    lines.append(f"Skewness: {result['skew']}, excess kurtosis: {result['kurtosis']}")
+    return lines
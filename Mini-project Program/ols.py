@@ -0,0 +1,85 @@
+"""Least-squares regression with NumPy, for many models at once.
+
+fit() regresses any number of dependent columns on one shared design matrix
+with a single factorization. simple_regressions() fits every dependent ~
+independent pair of a DataFrame from a handful of matrix products, handling
+missing values pair by pair. Both return coefficients, standard errors, R² and
+p-values as arrays; the statsmodels summary stays available as the detailed
+view in gex4.StatisticalTests.perform_regression.
+"""
+import numpy as np
+from scipy import stats
+
+
+def solve_normal_equations(xtx, xty, yty, n):
+    """Return (coefficients, standard errors, residual sum of squares) from OLS sums."""
+    coefficients = np.linalg.solve(xtx, xty)
+    residual = yty - coefficients @ xty
+    standard_errors = np.sqrt(np.diag(np.linalg.inv(xtx)) * residual / (n - len(xty)))
+    return coefficients, standard_errors, residual
+
+
+def fit(x, y, intercept=True):
+    """Regress each column of y on the shared design x.
+
+    x is (rows, features) and y is (rows,) or (rows, targets); rows with a
+    missing value anywhere are dropped. Returns a dict of arrays shaped
+    (coefficients, targets) for coefficients/standard_errors/t_values/p_values
+    and (targets,) for r_squared, with the intercept as the first coefficient.
+    """
+    x = np.asarray(x, dtype=float).reshape(len(x), -1)
+    y = np.asarray(y, dtype=float)
+    y = y.reshape(len(y), -1)
+    complete = ~(np.isnan(x).any(axis=1) | np.isnan(y).any(axis=1))
+    x, y = x[complete], y[complete]
+    if intercept:
+        x = np.column_stack((np.ones(len(x)), x))
+
+    n, size = x.shape
+    coefficients, _, rank, _ = np.linalg.lstsq(x, y, rcond=None)
+    residuals = y - x @ coefficients
+    dof = n - rank
+    sigma2 = (residuals ** 2).sum(axis=0) / dof
+    standard_errors = np.sqrt(np.outer(np.diag(np.linalg.pinv(x.T @ x)), sigma2))
+    t_values = coefficients / standard_errors
+    centred = y - y.mean(axis=0) if intercept else y
+    return {
+        'coefficients': coefficients, 'standard_errors': standard_errors, 't_values': t_values,
+        'p_values': 2 * stats.t.sf(np.abs(t_values), dof),
+        'r_squared': 1 - (residuals ** 2).sum(axis=0) / (centred ** 2).sum(axis=0), 'n': n,
+    }
+
+
+def simple_regressions(data, dependents, independents):
+    """Fit dependent ~ independent for every pair of columns at once.
+
+    Each pair uses the rows where both columns are present. Returns a dict of
+    arrays shaped (len(dependents), len(independents)): intercept, slope,
+    intercept_se, slope_se, t_value (of the slope), p_value, r_squared and n.
+    """
+    x = data[list(independents)].to_numpy(dtype=float, na_value=np.nan)
+    y = data[list(dependents)].to_numpy(dtype=float, na_value=np.nan)
+    # Centre each column first so the sums below don't lose precision
+    x_shift, y_shift = np.nanmean(x, axis=0), np.nanmean(y, axis=0)
+    x_present, y_present = (~np.isnan(x)).astype(float), (~np.isnan(y)).astype(float)
+    x0, y0 = np.nan_to_num(x - x_shift), np.nan_to_num(y - y_shift)
+
+    # Sums over the rows where both columns of a pair are present, shaped (dependents, independents)
+    n = y_present.T @ x_present
+    sx, sy = y_present.T @ x0, (y0.T @ x_present)
+    sxx, syy, sxy = y_present.T @ x0 ** 2, (y0 ** 2).T @ x_present, y0.T @ x0
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cxx, cyy, cxy = sxx - sx ** 2 / n, syy - sy ** 2 / n, sxy - sx * sy / n
+        slope = cxy / cxx
+        x_mean, y_mean = x_shift + sx / n, y_shift[:, None] + sy / n
+        intercept = y_mean - slope * x_mean
+        residual = np.clip(cyy - slope * cxy, 0, None)
+        sigma2 = residual / (n - 2)
+        slope_se = np.sqrt(sigma2 / cxx)
+        intercept_se = np.sqrt(sigma2 * (1 / n + x_mean ** 2 / cxx))
+        t_value = slope / slope_se
+        p_value = 2 * stats.t.sf(np.abs(t_value), n - 2)
+        r_squared = 1 - residual / cyy
+    return {'intercept': intercept, 'slope': slope, 'intercept_se': intercept_se, 'slope_se': slope_se,
+            't_value': t_value, 'p_value': p_value, 'r_squared': r_squared, 'n': n.astype(int)}
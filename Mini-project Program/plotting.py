@@ -0,0 +1,182 @@
+"""Figure output: interactive windows by default, or files rendered in the background.
+
+In render mode figures are drawn with the non-interactive Agg backend and
+written to an output directory by a pool of worker threads, so analysis
+continues while earlier figures are still being saved. Render mode is switched
+on with enable_render_mode(), or for main.py by setting ANALYSIS_RENDER_DIR
+(and optionally ANALYSIS_RENDER_FORMAT) in the environment.
+
+For columns above LARGE_DATA_ROWS rows, histograms and box plots are drawn from
+summaries computed with NumPy (bin counts, quartiles and whiskers) instead of
+handing every value to matplotlib, and scatter plots become hexbin density plots.
+"""
+import atexit
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import instrument
+
+# Columns with more rows than this are plotted from precomputed summaries
+LARGE_DATA_ROWS = 100_000
+# Histograms of arrays are binned this many values at a time
+CHUNK_ROWS = 1_000_000
+# Box plots draw at most this many outliers per box
+MAX_FLIERS = 1000
+
+# Active Renderer, or None to show figures interactively
+_renderer = None
+
+
+class Renderer:
+    """Writes figures to files from a background thread pool and logs each render."""
+
+    def __init__(self, output_dir, fmt='png', workers=2, dpi=100):
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self.dpi = dpi
+        self.jobs = []  # One record per finished render: name, path, seconds
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='render')
+        self._futures = []
+        self._numbers = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, figure, name):
+        """Queue a figure to be written as <number>-<name>.<fmt>; returns a Future of its record."""
+        slug = re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_') or 'figure'
+        path = os.path.join(self.output_dir, f"{next(self._numbers):03d}-{slug}.{self.fmt}")
+        future = self._pool.submit(self._render, figure, name, path)
+        self._futures.append(future)
+        return future
+
+    def _render(self, figure, name, path):
+        start = time.perf_counter()
+        with instrument.step('plotting.render'):
+            figure.savefig(path, format=self.fmt, dpi=self.dpi)
+        record = {'name': name, 'path': path, 'seconds': time.perf_counter() - start}
+        with self._lock:
+            self.jobs.append(record)
+            with open(os.path.join(self.output_dir, 'render_log.jsonl'), 'a') as log:
+                log.write(json.dumps(record) + '\n')
+        return record
+
+    def wait(self):
+        """Block until every queued figure is written and return the render records."""
+        for future in self._futures:
+            future.result()
+        self._futures = []
+        return list(self.jobs)
+
+    def close(self):
+        self.wait()
+        self._pool.shutdown()
+
+
+def enable_render_mode(output_dir='figures', fmt='png', workers=2, dpi=100):
+    """Write figures to files in output_dir instead of opening windows."""
+    global _renderer
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    disable_render_mode()
+    _renderer = Renderer(output_dir, fmt, workers, dpi)
+    return _renderer
+
+
+def disable_render_mode():
+    """Finish pending renders and go back to showing figures interactively."""
+    global _renderer
+    if _renderer is not None:
+        _renderer.close()
+        _renderer = None
+
+
+def enable_from_environment():
+    """Turn on render mode if ANALYSIS_RENDER_DIR is set."""
+    output_dir = os.environ.get('ANALYSIS_RENDER_DIR')
+    if output_dir:
+        return enable_render_mode(output_dir, os.environ.get('ANALYSIS_RENDER_FORMAT', 'png'))
+
+
+def show(name):
+    """Show the current pyplot figure, or queue it for rendering to a file in render mode."""
+    import matplotlib.pyplot as plt
+    if _renderer is None:
+        plt.show()
+        return None
+    figure = plt.gcf()
+    # Detach the figure from pyplot so the next plot starts on a fresh one
+    plt.close(figure)
+    return _renderer.submit(figure, name)
+
+
+def is_large(values):
+    """Check whether a column is big enough to plot from summaries."""
+    return len(values) > LARGE_DATA_ROWS
+
+
+def histogram_summary(values, bins=30, value_range=None, chunk_size=CHUNK_ROWS):
+    """Return (counts, edges) of a histogram, binning chunk_size values at a time.
+
+    `values` is an array-like, or an iterable of array chunks; chunks are read
+    in a single pass, so they need an explicit `value_range`. Missing values
+    are ignored.
+    """
+    if hasattr(values, '__len__'):
+        values = np.asarray(values, dtype=float)
+        if value_range is None:
+            finite = values[np.isfinite(values)]
+            value_range = (finite.min(), finite.max()) if len(finite) else (0.0, 1.0)
+        chunks = (values[start:start + chunk_size] for start in range(0, len(values), chunk_size))
+    elif value_range is None:
+        raise ValueError("value_range is required when values is a stream of chunks.")
+    else:
+        chunks = (np.asarray(chunk, dtype=float) for chunk in values)
+
+    edges = np.histogram_bin_edges([], bins=bins, range=value_range)
+    counts = np.zeros(len(edges) - 1, dtype=np.int64)
+    for chunk in chunks:
+        counts += np.histogram(chunk[np.isfinite(chunk)], bins=edges)[0]
+    return counts, edges
+
+
+def box_summary(values, label=None, whis=1.5, max_fliers=MAX_FLIERS, seed=0):
+    """Return box plot statistics of an array in the form Axes.bxp() expects."""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return {'label': label, 'med': np.nan, 'q1': np.nan, 'q3': np.nan,
+                'whislo': np.nan, 'whishi': np.nan, 'fliers': []}
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    low, high = q1 - whis * (q3 - q1), q3 + whis * (q3 - q1)
+    inside = values[(values >= low) & (values <= high)]
+    fliers = values[(values < low) | (values > high)]
+    if len(fliers) > max_fliers:
+        # Keep the extremes and a random sample of the rest
+        sample = np.random.default_rng(seed).choice(fliers, max_fliers - 2, replace=False)
+        fliers = np.concatenate(([fliers.min(), fliers.max()], sample))
+    return {'label': label, 'med': median, 'q1': q1, 'q3': q3,
+            'whislo': inside.min() if len(inside) else q1,
+            'whishi': inside.max() if len(inside) else q3, 'fliers': fliers}
+
+
+def draw_histogram(counts, edges, **kwargs):
+    """Draw precomputed histogram counts on the current axes."""
+    import matplotlib.pyplot as plt
+    plt.stairs(counts, edges, fill=True, **kwargs)
+
+
+def draw_boxplots(summaries):
+    """Draw box plots from box_summary() results on the current axes."""
+    import matplotlib.pyplot as plt
+    plt.gca().bxp(summaries)
+
+
+# Don't lose figures that are still being written when the program exits
+atexit.register(disable_render_mode)
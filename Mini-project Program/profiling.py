@@ -0,0 +1,188 @@
+"""Single-pass column profiling with mergeable partial results.
+
+ProfileAccumulator takes a DataFrame chunk at a time. For all numeric columns
+at once it keeps the count, missing count, mean and central moment sums, from
+which std, skew and kurtosis follow. It also keeps a bounded uniform row sample
+for quantiles, and value counts for every other column. Two accumulators built
+from different chunks, files or processes can be merged, so
+profile_csv(chunksize=...) and profiles of parallel-loaded data give the same
+summary as profile() on the whole frame. Quantiles are exact while the total
+row count fits in the sample, and estimated from the sample beyond that.
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SAMPLE_SIZE = 100_000
+QUANTILES = [0.25, 0.5, 0.75]
+
+
+def _is_numeric(series):
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def _combine_moments(a, b):
+    """Merge two (count, mean, M2, M3, M4) tuples of arrays, column by column."""
+    n_a, mean_a, m2_a, m3_a, m4_a = a
+    n_b, mean_b, m2_b, m3_b, m4_b = b
+    n = n_a + n_b
+    n_safe = np.where(n > 0, n, 1)
+    # An empty side contributes nothing, whatever mean it has stored
+    delta = np.where((n_a > 0) & (n_b > 0), mean_b - mean_a, 0.0)
+    mean = np.where(n_a > 0, mean_a, mean_b) + delta * n_b / n_safe
+    m2 = m2_a + m2_b + delta ** 2 * n_a * n_b / n_safe
+    m3 = (m3_a + m3_b + delta ** 3 * n_a * n_b * (n_a - n_b) / n_safe ** 2
+          + 3 * delta * (n_a * m2_b - n_b * m2_a) / n_safe)
+    m4 = (m4_a + m4_b + delta ** 4 * n_a * n_b * (n_a ** 2 - n_a * n_b + n_b ** 2) / n_safe ** 3
+          + 6 * delta ** 2 * (n_a ** 2 * m2_b + n_b ** 2 * m2_a) / n_safe ** 2
+          + 4 * delta * (n_a * m3_b - n_b * m3_a) / n_safe)
+    return n, mean, m2, m3, m4
+
+
+class ProfileAccumulator:
+    """Mergeable summary of a dataset, built from one or more DataFrame chunks."""
+
+    def __init__(self, sample_size=DEFAULT_SAMPLE_SIZE, seed=0):
+        self.sample_size = sample_size
+        self.rng = np.random.default_rng(seed)
+        self.rows = 0
+        self.numeric_columns = []
+        self.count = self.mean = self.m2 = self.m3 = self.m4 = np.zeros(0)
+        self.minimum = self.maximum = np.zeros(0)
+        # Uniform row sample of the numeric columns: keep the rows with the smallest random keys
+        self.sample = np.zeros((0, 0))
+        self.sample_keys = np.zeros(0)
+        self.value_counts = {}  # column -> Series of counts
+        self.missing = {}  # categorical column -> missing count
+
+    def _align(self, columns):
+        """Extend the numeric state to cover the given columns, in a stable order."""
+        new = [column for column in columns if column not in self.numeric_columns]
+        if not new:
+            return
+        self.numeric_columns = self.numeric_columns + new
+        extra = len(new)
+        pad = lambda array, fill=0.0: np.concatenate((array, np.full(extra, fill)))
+        self.count, self.mean = pad(self.count), pad(self.mean)
+        self.m2, self.m3, self.m4 = pad(self.m2), pad(self.m3), pad(self.m4)
+        self.minimum, self.maximum = pad(self.minimum, np.inf), pad(self.maximum, -np.inf)
+        self.sample = np.hstack((self.sample, np.full((len(self.sample), extra), np.nan)))
+
+    def _state(self, columns):
+        positions = [self.numeric_columns.index(column) for column in columns]
+        return positions, (self.count[positions], self.mean[positions], self.m2[positions],
+                           self.m3[positions], self.m4[positions])
+
+    def _add_moments(self, columns, moments, minimum, maximum):
+        self._align(columns)
+        positions, current = self._state(columns)
+        n, mean, m2, m3, m4 = _combine_moments(current, moments)
+        self.count[positions], self.mean[positions] = n, mean
+        self.m2[positions], self.m3[positions], self.m4[positions] = m2, m3, m4
+        self.minimum[positions] = np.fmin(self.minimum[positions], minimum)
+        self.maximum[positions] = np.fmax(self.maximum[positions], maximum)
+
+    def _add_sample(self, columns, sample, keys):
+        self._align(columns)
+        positions = [self.numeric_columns.index(column) for column in columns]
+        rows = np.full((len(sample), len(self.numeric_columns)), np.nan)
+        rows[:, positions] = sample
+        self.sample = np.vstack((self.sample, rows))
+        self.sample_keys = np.concatenate((self.sample_keys, keys))
+        if len(self.sample_keys) > self.sample_size:
+            keep = np.argpartition(self.sample_keys, self.sample_size)[:self.sample_size]
+            self.sample, self.sample_keys = self.sample[keep], self.sample_keys[keep]
+
+    def update(self, chunk):
+        """Add the rows of a DataFrame chunk."""
+        if not len(chunk):
+            return self
+        self.rows += len(chunk)
+        numeric = [column for column in chunk.columns if _is_numeric(chunk[column])]
+        if numeric:
+            values = chunk[numeric].to_numpy(dtype=float, na_value=np.nan)
+            present = ~np.isnan(values)
+            count = present.sum(axis=0).astype(float)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = np.nansum(values, axis=0) / count
+                deviations = values - mean
+            squares = np.nan_to_num(deviations ** 2)
+            moments = (count, np.nan_to_num(mean), squares.sum(axis=0),
+                       np.nansum(deviations ** 3, axis=0), (squares ** 2).sum(axis=0))
+            minimum = np.where(present, values, np.inf).min(axis=0)
+            maximum = np.where(present, values, -np.inf).max(axis=0)
+            self._add_moments(numeric, moments, minimum, maximum)
+            self._add_sample(numeric, values, self.rng.random(len(values)))
+
+        for column in chunk.columns:
+            if column in numeric:
+                continue
+            counts = chunk[column].value_counts(dropna=True)
+            counts.index = counts.index.astype(object)
+            previous = self.value_counts.get(column)
+            self.value_counts[column] = counts if previous is None else previous.add(counts, fill_value=0)
+            self.missing[column] = self.missing.get(column, 0) + int(chunk[column].isna().sum())
+        return self
+
+    def merge(self, other):
+        """Add the rows summarized by another accumulator."""
+        self.rows += other.rows
+        if other.numeric_columns:
+            _, moments = other._state(other.numeric_columns)
+            self._add_moments(other.numeric_columns, moments, other.minimum, other.maximum)
+            self._add_sample(other.numeric_columns, other.sample, other.sample_keys)
+        for column, counts in other.value_counts.items():
+            previous = self.value_counts.get(column)
+            self.value_counts[column] = counts if previous is None else previous.add(counts, fill_value=0)
+            self.missing[column] = self.missing.get(column, 0) + other.missing[column]
+        return self
+
+    def summary(self):
+        """Return one row per column with count, missing, moments, quantiles and top values."""
+        rows = {}
+        n, m2, m3, m4 = self.count, self.m2, self.m3, self.m4
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.where(n > 1, np.sqrt(m2 / (n - 1)), np.nan)
+            # Bias-corrected sample skewness and excess kurtosis, as pandas computes them
+            skew = np.where((n > 2) & (m2 > 0), n * np.sqrt(n - 1) / (n - 2) * m3 / m2 ** 1.5, np.nan)
+            kurtosis = np.where((n > 3) & (m2 > 0),
+                                n * (n + 1) * (n - 1) * m4 / ((n - 2) * (n - 3) * m2 ** 2)
+                                - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3)), np.nan)
+        if self.numeric_columns and len(self.sample_keys):
+            with warnings.catch_warnings():
+                # Columns with no values at all get NaN quantiles
+                warnings.simplefilter('ignore', RuntimeWarning)
+                quantiles = np.nanquantile(self.sample, QUANTILES, axis=0)
+        else:
+            quantiles = np.full((len(QUANTILES), len(self.numeric_columns)), np.nan)
+
+        for i, column in enumerate(self.numeric_columns):
+            present = n[i] > 0
+            rows[column] = {
+                'kind': 'numeric', 'count': int(n[i]), 'missing': int(self.rows - n[i]),
+                'mean': self.mean[i] if present else np.nan, 'std': std[i], 'skew': skew[i],
+                'kurtosis': kurtosis[i], 'min': self.minimum[i] if present else np.nan,
+                '25%': quantiles[0, i], '50%': quantiles[1, i], '75%': quantiles[2, i],
+                'max': self.maximum[i] if present else np.nan,
+            }
+        for column, counts in self.value_counts.items():
+            rows[column] = {
+                'kind': 'categorical', 'count': int(counts.sum()), 'missing': self.missing[column],
+                'unique': len(counts), 'top': counts.idxmax() if len(counts) else None,
+                'freq': int(counts.max()) if len(counts) else 0,
+            }
+        return pd.DataFrame.from_dict(rows, orient='index')
+
+
+def profile(data, sample_size=DEFAULT_SAMPLE_SIZE, seed=0):
+    """Return a summary DataFrame of every column in one pass over the data."""
+    return ProfileAccumulator(sample_size, seed).update(data).summary()
+
+
+def profile_csv(path, chunksize=1_000_000, encoding='ISO-8859-1', sample_size=DEFAULT_SAMPLE_SIZE, seed=0):
+    """Profile a CSV chunk by chunk without loading it all into memory."""
+    accumulator = ProfileAccumulator(sample_size, seed)
+    for chunk in pd.read_csv(path, chunksize=chunksize, encoding=encoding):
+        accumulator.update(chunk)
+    return accumulator.summary()
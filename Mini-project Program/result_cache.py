@@ -0,0 +1,161 @@
+"""Persistent cache of statistical test results for unchanged datasets.
+
+Results are keyed by a dataset fingerprint, the test name, its variables and
+its parameters. The fingerprint combines a SHA-1 hash of the source file, as
+it was when the data was loaded, with the transformations applied to the data
+since then (the list that gex2.DataInspection records in
+`data.attrs['transformations']`). File hashes are stored with the file's mtime
+and size, so an unchanged file isn't read again, and a changed file gets a new
+hash and drops the results of its old one. Data whose file has changed since
+it was loaded can't be hashed any more, so its results aren't cached.
+
+Use it by passing `results=ResultCache().for_dataset(data, path)` to
+gex3.DataAnalysis or gex4.StatisticalTests; their compute_* methods are
+wrapped with @cached_result and return stored results for repeat requests.
+"""
+import functools
+import hashlib
+import json
+import os
+
+import lru_store
+
+DEFAULT_CACHE_PATH = os.path.join('.cache', 'results.sqlite')
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def _to_json(value):
+    # NumPy scalars and arrays in test results
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Cannot store {type(value).__name__} in the result cache")
+
+
+class ResultCache:
+    """Persistent store of test results keyed by dataset fingerprint, test, variables and parameters.
+
+    Holds at most `max_entries` results in an LRUStore, next to a table of file hashes.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=10_000):
+        self.path = path
+        self.store = lru_store.LRUStore(path, 'results', ('key',), 'result', extra_columns=('source',),
+                                        max_entries=max_entries, json_default=_to_json)
+        self.connection = self.store.connection
+        self.connection.execute("CREATE INDEX IF NOT EXISTS results_source ON results (source)")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, digest TEXT)")
+        self.connection.commit()
+
+    def source_digest(self, source):
+        """Return the SHA-1 of a file recorded as {'path', 'mtime_ns', 'size'}, or None if it has changed since."""
+        stat = os.stat(source['path'])
+        if (stat.st_mtime_ns, stat.st_size) != (source['mtime_ns'], source['size']):
+            return None
+        return self.file_digest(source['path'])
+
+    def file_digest(self, path):
+        """Return the SHA-1 of a file, rehashing only when its mtime or size changed."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        row = self.connection.execute(
+            "SELECT mtime_ns, size, digest FROM files WHERE path = ?", (path,)).fetchone()
+        if row is not None and row[:2] == (stat.st_mtime_ns, stat.st_size):
+            return row[2]
+
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        digest = digest.hexdigest()
+        self.connection.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                                (path, stat.st_mtime_ns, stat.st_size, digest))
+        if row is not None and row[2] != digest:
+            # The file changed: its old results can never be asked for again
+            self.connection.execute(
+                "DELETE FROM results WHERE source = ? AND source NOT IN (SELECT digest FROM files)", (row[2],))
+        self.connection.commit()
+        return digest
+
+    @staticmethod
+    def _key(fingerprint, test, variables, params):
+        key = json.dumps([fingerprint, test, list(variables), params or {}], sort_keys=True, default=str)
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def get(self, fingerprint, test, variables, params=None):
+        """Return the stored result, or None if this test hasn't been run on this data."""
+        key = (self._key(fingerprint, test, variables, params),)
+        return self.store.get_many([key]).get(key)
+
+    def put(self, fingerprint, test, variables, params, result, source=None):
+        """Store a result computed on the file with digest `source`."""
+        self.store.put_many([((self._key(fingerprint, test, variables, params),), result, (source,))])
+
+    def for_dataset(self, data, path):
+        """Return a DatasetResults view for a DataFrame loaded from path."""
+        return DatasetResults(self, data, path)
+
+    def clear(self):
+        """Remove every cached result and file hash."""
+        self.store.clear()
+        self.connection.execute("DELETE FROM files")
+        self.connection.commit()
+
+    def close(self):
+        self.store.close()
+
+
+class DatasetResults:
+    """Results of one loaded dataset.
+
+    The source file is hashed once, when the view is created, as it was when
+    loader.load_dataset() read it (df.attrs['source']); only the list of
+    transformations is read again on each lookup.
+    """
+
+    def __init__(self, cache, data, path):
+        self.cache = cache
+        self.data = data
+        self.path = path
+        source = data.attrs.get('source')
+        if source is None:
+            # Not from the loader: assume the file is what the data was read from
+            stat = os.stat(path)
+            source = {'path': os.path.abspath(path), 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+        # None when the file changed after the data was loaded
+        self.source = cache.source_digest(source)
+
+    def fingerprint(self):
+        """Return the fingerprint of the source file plus the transformations applied to the data."""
+        transformations = self.data.attrs.get('transformations', [])
+        combined = json.dumps([self.source, transformations], sort_keys=True, default=str)
+        return hashlib.sha1(combined.encode('utf-8')).hexdigest()
+
+    def cached(self, test, variables, params, compute):
+        """Return the stored result of a test, or compute, store and return it."""
+        if self.source is None:
+            return compute()
+        fingerprint = self.fingerprint()
+        result = self.cache.get(fingerprint, test, variables, params)
+        if result is None:
+            result = compute()
+            self.cache.put(fingerprint, test, variables, params, result, self.source)
+        return result
+
+
+def cached_result(test):
+    """Decorator for compute_* methods of classes with an optional `results` DatasetResults.
+
+    Positional arguments are the test's variables and keyword arguments its
+    parameters. Without `results` the method runs as before.
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *variables, **params):
+            results = getattr(self, 'results', None)
+            if results is None:
+                return method(self, *variables, **params)
+            return results.cached(test, variables, params, lambda: method(self, *variables, **params))
+        return wrapper
+    return decorate
@@ -0,0 +1,227 @@
+"""Run every pairwise test in a dataset with vectorized kernels and a process pool.
+
+The sweep covers every categorical x categorical chi-square, every numeric x
+categorical ANOVA and Kruskal-Wallis test, and every numeric x numeric
+correlation/regression. Each column is factorized (categoricals) or ranked
+(numerics) once, and contingency tables and group sums are built with
+np.bincount instead of one crosstab/groupby per pair. The results are sorted by
+p-value and corrected for multiple testing.
+
+Usage:
+    python sweep.py test.csv [-o sweep.csv] [--workers 4] [--alpha 0.05]
+"""
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+import groups
+import loader
+
+# Encoded columns for the current process, set by _init_worker
+_columns = None
+
+
+class EncodedColumns:
+    """Columns of a DataFrame converted once into arrays the test kernels work on."""
+
+    def __init__(self, data):
+        self.numeric = {}  # name -> float array with NaN for missing values
+        self.ranks = {}  # name -> (ranks of the non-missing values, tie correction)
+        self.categorical = {}  # name -> (integer codes with -1 for missing, number of categories)
+        for column in data.select_dtypes(include='number').columns:
+            values = data[column].to_numpy(dtype=float)
+            self.numeric[column] = values
+            self.ranks[column] = _rank(values[~np.isnan(values)])
+        for column in data.select_dtypes(include=['category', 'object']).columns:
+            index = groups.group_index(data, column)
+            self.categorical[column] = (index.codes, len(index))
+
+
+def _rank(values):
+    """Return average ranks of values and the Kruskal-Wallis tie correction factor."""
+    ranks = stats.rankdata(values)
+    _, ties = np.unique(values, return_counts=True)
+    n = len(values)
+    correction = 1.0 - (ties ** 3 - ties).sum() / (n ** 3 - n) if n > 1 else 1.0
+    return ranks, correction
+
+
+def chisquare_kernel(columns, x, y):
+    """Chi-square test of independence between two categorical columns."""
+    x_codes, x_size = columns.categorical[x]
+    y_codes, y_size = columns.categorical[y]
+    valid = (x_codes >= 0) & (y_codes >= 0)
+    table = np.bincount(x_codes[valid] * y_size + y_codes[valid], minlength=x_size * y_size)
+    table = table.reshape(x_size, y_size)
+    table = table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]
+    if min(table.shape) < 2:
+        return {'statistic': np.nan, 'p_value': np.nan, 'dof': 0, 'n': int(table.sum())}
+    stat, p, dof, expected = stats.chi2_contingency(table)
+    return {'statistic': stat, 'p_value': p, 'dof': dof, 'n': int(table.sum())}
+
+
+def _grouped(columns, x, y):
+    """Return the mask of usable rows, their group codes and the per-group counts for a pair."""
+    values = columns.numeric[x]
+    codes, size = columns.categorical[y]
+    valid = ~np.isnan(values) & (codes >= 0)
+    return valid, codes[valid], np.bincount(codes[valid], minlength=size)
+
+
+def anova_kernel(columns, x, y):
+    """One-way ANOVA of a numeric column across the groups of a categorical column."""
+    valid, codes, counts = _grouped(columns, x, y)
+    values = columns.numeric[x][valid]
+    # Centre on the overall mean so the sums of squares stay accurate
+    values = values - values.mean() if len(values) else values
+    sums = np.bincount(codes, weights=values, minlength=len(counts))
+    squares = np.bincount(codes, weights=values * values, minlength=len(counts))
+    present = counts > 0
+    counts, sums, squares = counts[present], sums[present], squares[present]
+    k, n = len(counts), counts.sum()
+    if k < 2 or n <= k:
+        return {'statistic': np.nan, 'p_value': np.nan, 'groups': k, 'n': int(n)}
+    between = (sums ** 2 / counts).sum() - sums.sum() ** 2 / n
+    within = squares.sum() - (sums ** 2 / counts).sum()
+    f_val = (between / (k - 1)) / (within / (n - k))
+    return {'statistic': f_val, 'p_value': stats.f.sf(f_val, k - 1, n - k), 'groups': k, 'n': int(n)}
+
+
+def kruskal_kernel(columns, x, y):
+    """Kruskal-Wallis H test of a numeric column across the groups of a categorical column."""
+    valid, codes, counts = _grouped(columns, x, y)
+    values = columns.numeric[x]
+    if valid.sum() == (~np.isnan(values)).sum():
+        # No rows dropped for this pair, so the ranks computed up front still apply
+        ranks, correction = columns.ranks[x]
+    else:
+        ranks, correction = _rank(values[valid])
+    rank_sums = np.bincount(codes, weights=ranks, minlength=len(counts))
+    present = counts > 0
+    counts, rank_sums = counts[present], rank_sums[present]
+    k, n = len(counts), counts.sum()
+    if k < 2 or correction == 0:
+        return {'statistic': np.nan, 'p_value': np.nan, 'groups': k, 'n': int(n)}
+    h_val = (12.0 / (n * (n + 1)) * (rank_sums ** 2 / counts).sum() - 3 * (n + 1)) / correction
+    return {'statistic': h_val, 'p_value': stats.chi2.sf(h_val, k - 1), 'groups': k, 'n': int(n)}
+
+
+def correlation_kernel(columns, x, y):
+    """Pearson correlation and simple regression of y on x for two numeric columns."""
+    x_values, y_values = columns.numeric[x], columns.numeric[y]
+    valid = ~np.isnan(x_values) & ~np.isnan(y_values)
+    x_values, y_values = x_values[valid], y_values[valid]
+    n = len(x_values)
+    if n < 3:
+        return {'statistic': np.nan, 'p_value': np.nan, 'n': n}
+    dx, dy = x_values - x_values.mean(), y_values - y_values.mean()
+    sxx, syy, sxy = dx @ dx, dy @ dy, dx @ dy
+    if sxx == 0 or syy == 0:
+        return {'statistic': np.nan, 'p_value': np.nan, 'n': n}
+    r = min(max(sxy / np.sqrt(sxx * syy), -1.0), 1.0)
+    t = r * np.sqrt((n - 2) / (1 - r * r)) if abs(r) < 1 else np.copysign(np.inf, r)
+    slope = sxy / sxx
+    return {'statistic': r, 'p_value': 2 * stats.t.sf(abs(t), n - 2), 'n': n,
+            'slope': slope, 'intercept': y_values.mean() - slope * x_values.mean()}
+
+
+KERNELS = {
+    'chisquare': chisquare_kernel,
+    'anova': anova_kernel,
+    'kruskal': kruskal_kernel,
+    'correlation': correlation_kernel,
+}
+
+
+def sweep_pairs(columns):
+    """Return every (test, x, y) the sweep runs."""
+    numeric, categorical = list(columns.numeric), list(columns.categorical)
+    pairs = [('chisquare', x, y) for x, y in itertools.combinations(categorical, 2)]
+    for x, y in itertools.product(numeric, categorical):
+        pairs += [('anova', x, y), ('kruskal', x, y)]
+    pairs += [('correlation', x, y) for x, y in itertools.combinations(numeric, 2)]
+    return pairs
+
+
+def _init_worker(columns):
+    global _columns
+    _columns = columns
+
+
+def _run_pairs(pairs):
+    return [run_pair(_columns, *pair) for pair in pairs]
+
+
+def run_pair(columns, test, x, y):
+    """Run one kernel and return its result row."""
+    row = {'test': test, 'x': x, 'y': y}
+    try:
+        row.update(KERNELS[test](columns, x, y))
+    except Exception as e:
+        row['error'] = f"{type(e).__name__}: {e}"
+    return row
+
+
+def adjust_p_values(p_values, alpha=0.05):
+    """Return Benjamini-Hochberg and Bonferroni adjusted p-values, ignoring NaNs."""
+    from statsmodels.stats.multitest import multipletests
+    p_values = np.asarray(p_values, dtype=float)
+    fdr = np.full(len(p_values), np.nan)
+    bonferroni = np.full(len(p_values), np.nan)
+    tested = ~np.isnan(p_values)
+    if tested.any():
+        fdr[tested] = multipletests(p_values[tested], alpha, method='fdr_bh')[1]
+        bonferroni[tested] = multipletests(p_values[tested], alpha, method='bonferroni')[1]
+    return fdr, bonferroni
+
+
+def run_sweep(data, workers=None, alpha=0.05, pairs_per_task=64):
+    """Run every pairwise test on a DataFrame and return the results sorted by p-value.
+
+    `p_fdr` holds Benjamini-Hochberg adjusted p-values and `significant` marks
+    the pairs with p_fdr below `alpha`.
+    """
+    columns = EncodedColumns(data)
+    pairs = sweep_pairs(columns)
+    tasks = [pairs[start:start + pairs_per_task] for start in range(0, len(pairs), pairs_per_task)]
+
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        rows = [run_pair(columns, *pair) for pair in pairs]
+    else:
+        # Each worker receives the encoded columns once, then only pair names
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(columns,)) as pool:
+            rows = [row for task_rows in pool.map(_run_pairs, tasks) for row in task_rows]
+
+    results = pd.DataFrame(rows)
+    leading = ['test', 'x', 'y', 'statistic', 'p_value', 'n']
+    results = results.reindex(columns=leading + [column for column in results.columns if column not in leading])
+    results['p_fdr'], results['p_bonferroni'] = adjust_p_values(results['p_value'], alpha)
+    results['significant'] = results['p_fdr'] < alpha
+    return results.sort_values('p_value', na_position='last', kind='stable').reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run every pairwise statistical test in a dataset.")
+    parser.add_argument('data', help="CSV dataset")
+    parser.add_argument('-o', '--output', help="Results CSV (printed if omitted)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--alpha', type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    results = run_sweep(loader.load_dataset(args.data, report=False), args.workers, args.alpha)
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"Wrote {len(results)} results to {args.output}")
+    else:
+        print(results.to_string(index=False))
+    return results
+
+
+if __name__ == "__main__":
+    main()
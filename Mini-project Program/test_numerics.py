@@ -0,0 +1,195 @@
+"""Check the hand-written statistics against SciPy, statsmodels and the in-memory tests, on test.csv.
+
+Run with `python -m pytest` from this directory.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+from scipy import stats
+
+import accumulators
+import gex3
+import gex4
+import normality
+import ols
+import sweep
+
+TEST_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test.csv')
+NUMERIC = ['Age', 'Height', 'Weight', 'FCVC', 'CH2O', 'FAF']
+RTOL = 1e-7
+
+
+@pytest.fixture(scope='module')
+def data():
+    return pd.read_csv(TEST_CSV, encoding='ISO-8859-1')
+
+
+@pytest.fixture(scope='module')
+def data_with_gaps(data):
+    # Missing values in different rows of different columns, so pairs drop different rows
+    gaps = data.copy()
+    rng = np.random.default_rng(0)
+    for column in ['Height', 'Weight', 'Age', 'NObeyesdad']:
+        gaps.loc[rng.choice(len(gaps), 50, replace=False), column] = np.nan
+    return gaps
+
+
+def accumulate(accumulator_type, data, *args, chunks=3):
+    """Build one accumulator per chunk of data and merge them, as separate processes would."""
+    merged = accumulator_type(*args)
+    for chunk in np.array_split(np.arange(len(data)), chunks):
+        merged.merge(accumulator_type(*args).update(data.iloc[chunk]))
+    return merged
+
+
+def assert_same(result, expected, keys=('statistic', 'p_value', 'n')):
+    for key in keys:
+        np.testing.assert_allclose(result[key], expected[key], rtol=RTOL, err_msg=key)
+
+
+# accumulators.py
+
+def test_group_moments_anova_matches_gex3(data):
+    result = accumulate(accumulators.GroupMomentsAccumulator, data, 'Weight', 'NObeyesdad').anova()
+    assert_same(result, gex3.DataAnalysis(data).compute_anova('Weight', 'NObeyesdad'),
+                ('statistic', 'p_value', 'n', 'groups'))
+
+
+def test_group_moments_ttest_matches_gex4(data):
+    accumulator = accumulate(accumulators.GroupMomentsAccumulator, data, 'Height', 'Gender')
+    assert_same(accumulator.ttest(), gex4.StatisticalTests(data).compute_ttest('Height', 'Gender'))
+
+    groups = [group['Height'] for _, group in data.groupby('Gender', sort=False)]
+    welch = stats.ttest_ind(*groups, equal_var=False)
+    np.testing.assert_allclose([accumulator.ttest(equal_var=False)[key] for key in ('statistic', 'p_value')],
+                               [welch.statistic, welch.pvalue], rtol=RTOL)
+
+
+def test_contingency_chisquare_matches_gex4(data):
+    accumulator = accumulate(accumulators.ContingencyAccumulator, data, 'Gender', 'NObeyesdad')
+    expected = gex4.StatisticalTests(data).compute_chisquare('Gender', 'NObeyesdad')
+    assert_same(accumulator.chisquare(), expected, ('statistic', 'p_value', 'n', 'dof'))
+    crosstab = pd.crosstab(data['Gender'], data['NObeyesdad'])
+    pd.testing.assert_frame_equal(accumulator.table().loc[crosstab.index, crosstab.columns], crosstab,
+                                  check_dtype=False, check_names=False)
+
+
+def test_ols_accumulator_matches_statsmodels(data_with_gaps):
+    fit = accumulate(accumulators.OLSAccumulator, data_with_gaps, 'Weight', ['Height', 'Age', 'FAF']).fit()
+    rows = data_with_gaps[['Height', 'Age', 'FAF', 'Weight']].dropna()
+    model = sm.OLS(rows['Weight'], sm.add_constant(rows[['Height', 'Age', 'FAF']])).fit()
+    for name, expected in (('coefficients', model.params), ('standard_errors', model.bse),
+                           ('t_values', model.tvalues), ('p_values', model.pvalues)):
+        np.testing.assert_allclose(pd.Series(fit[name]), expected.to_numpy(), rtol=1e-6, err_msg=name)
+    np.testing.assert_allclose(fit['r_squared'], model.rsquared, rtol=RTOL)
+    assert fit['n'] == model.nobs
+
+
+def test_ols_accumulator_regression_matches_gex4(data):
+    result = accumulate(accumulators.OLSAccumulator, data, 'Weight', 'Height').regression()
+    assert_same(result, gex4.StatisticalTests(data).compute_regression('Weight', 'Height'),
+                ('statistic', 'p_value', 'n', 'intercept', 'slope', 'r_squared'))
+
+
+# ols.py
+
+def test_simple_regressions_match_statsmodels(data_with_gaps):
+    dependents, independents = ['Weight', 'Age'], ['Height', 'FCVC', 'CH2O']
+    fit = ols.simple_regressions(data_with_gaps, dependents, independents)
+    for i, dependent in enumerate(dependents):
+        for j, independent in enumerate(independents):
+            rows = data_with_gaps[[independent, dependent]].dropna()
+            model = sm.OLS(rows[dependent], sm.add_constant(rows[independent])).fit()
+            expected = {'intercept': model.params.iloc[0], 'slope': model.params.iloc[1],
+                        'intercept_se': model.bse.iloc[0], 'slope_se': model.bse.iloc[1],
+                        't_value': model.tvalues.iloc[1], 'p_value': model.pvalues.iloc[1],
+                        'r_squared': model.rsquared, 'n': model.nobs}
+            for name, value in expected.items():
+                np.testing.assert_allclose(fit[name][i, j], value, rtol=1e-6,
+                                           err_msg=f'{dependent} ~ {independent}: {name}')
+
+
+def test_fit_matches_statsmodels(data_with_gaps):
+    rows = data_with_gaps[['Height', 'Age', 'Weight', 'FAF']].dropna()
+    fit = ols.fit(rows[['Height', 'Age']], rows[['Weight', 'FAF']])
+    for k, dependent in enumerate(['Weight', 'FAF']):
+        model = sm.OLS(rows[dependent], sm.add_constant(rows[['Height', 'Age']])).fit()
+        np.testing.assert_allclose(fit['coefficients'][:, k], model.params, rtol=1e-6)
+        np.testing.assert_allclose(fit['standard_errors'][:, k], model.bse, rtol=1e-6)
+        np.testing.assert_allclose(fit['p_values'][:, k], model.pvalues, rtol=1e-6)
+        np.testing.assert_allclose(fit['r_squared'][k], model.rsquared, rtol=RTOL)
+
+
+# normality.py
+
+@pytest.mark.parametrize('column', NUMERIC)
+def test_dagostino_pearson_matches_normaltest(data, column):
+    values = data[column].to_numpy(dtype=float)
+    deviations = values - values.mean()
+    statistic, p = normality.dagostino_pearson(len(values), *(np.sum(deviations ** k) for k in (2, 3, 4)))
+    expected = stats.normaltest(values)
+    np.testing.assert_allclose([statistic, p], [expected.statistic, expected.pvalue], rtol=1e-6)
+
+    result = normality.assess(data, column)
+    np.testing.assert_allclose([result['dagostino_statistic'], result['dagostino_p']],
+                               [expected.statistic, expected.pvalue], rtol=1e-6)
+
+
+# SciPy 1.17 warns that stats.anderson will need a p-value `method`; only the statistic is compared
+@pytest.mark.filterwarnings('ignore::FutureWarning')
+def test_anderson_darling_statistic_matches_scipy(data):
+    values = data['Height'].to_numpy(dtype=float)
+    np.testing.assert_allclose(normality.anderson_darling(values)[0], stats.anderson(values, 'norm').statistic,
+                               rtol=1e-6)
+
+
+# sweep.py
+
+@pytest.fixture(scope='module')
+def columns(data_with_gaps):
+    return sweep.EncodedColumns(data_with_gaps)
+
+
+@pytest.mark.parametrize('x, y', [('Gender', 'NObeyesdad'), ('MTRANS', 'CAEC')])
+def test_chisquare_kernel_matches_scipy(data_with_gaps, columns, x, y):
+    table = pd.crosstab(data_with_gaps[x], data_with_gaps[y])
+    statistic, p, dof, _ = stats.chi2_contingency(table)
+    assert_same(sweep.chisquare_kernel(columns, x, y),
+                {'statistic': statistic, 'p_value': p, 'dof': dof, 'n': table.values.sum()},
+                ('statistic', 'p_value', 'n', 'dof'))
+
+
+def _groups(data, x, y):
+    rows = data[[x, y]].dropna()
+    return [group[x].to_numpy() for _, group in rows.groupby(y, sort=False)]
+
+
+@pytest.mark.parametrize('x, y', [('Weight', 'NObeyesdad'), ('Height', 'Gender'), ('Age', 'MTRANS')])
+def test_anova_kernel_matches_f_oneway(data_with_gaps, columns, x, y):
+    groups = _groups(data_with_gaps, x, y)
+    expected = stats.f_oneway(*groups)
+    assert_same(sweep.anova_kernel(columns, x, y), {'statistic': expected.statistic, 'p_value': expected.pvalue,
+                                                    'n': sum(map(len, groups))})
+
+
+# Weight ~ NObeyesdad drops rows of both columns, so its ranks are recomputed;
+# FCVC ~ Gender keeps every row and uses the ranks computed up front
+@pytest.mark.parametrize('x, y', [('Weight', 'NObeyesdad'), ('FCVC', 'Gender'), ('Age', 'MTRANS')])
+def test_kruskal_kernel_matches_scipy(data_with_gaps, columns, x, y):
+    groups = _groups(data_with_gaps, x, y)
+    expected = stats.kruskal(*groups)
+    assert_same(sweep.kruskal_kernel(columns, x, y), {'statistic': expected.statistic, 'p_value': expected.pvalue,
+                                                      'n': sum(map(len, groups))})
+
+
+@pytest.mark.parametrize('x, y', [('Height', 'Weight'), ('Age', 'FAF')])
+def test_correlation_kernel_matches_linregress(data_with_gaps, columns, x, y):
+    rows = data_with_gaps[[x, y]].dropna()
+    expected = stats.linregress(rows[x], rows[y])
+    result = sweep.correlation_kernel(columns, x, y)
+    assert_same(result, {'statistic': expected.rvalue, 'p_value': expected.pvalue, 'n': len(rows),
+                         'slope': expected.slope, 'intercept': expected.intercept},
+                ('statistic', 'p_value', 'n', 'slope', 'intercept'))